@@ -1,15 +1,29 @@
 import sqlite3
 import os
+import hashlib
 import logging
+import threading
 from faker import Faker
 from app.config import Config
 
+# Length of TOKEN pseudonyms, on the Anonymizer path and pushed down alike
+TOKEN_LENGTH = 20
+
+def keyed_hash(key, value):
+    """sha256(key || value) as lowercase hex; push-down computes the same digest in SQL."""
+    if value is None:
+        return None
+    return hashlib.sha256((key + str(value)).encode('utf-8')).hexdigest()
+
 class Anonymizer:
     def __init__(self):
         self.logger = logging.getLogger("Anonymizer")
         self.fake = Faker('pt_BR') # Portuguese context
         self.db_path = Config.ANONYMIZATION_DB_PATH
-        self.conn = sqlite3.connect(self.db_path)
+        # Shared by execution workers: one connection guarded by a lock so the
+        # lookup-or-insert below stays atomic and every worker sees the same fake.
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.RLock()
         self._init_db()
 
     def _init_db(self):
@@ -27,6 +41,10 @@ class Anonymizer:
         if not original_str.strip():
             return original_value
 
+        with self._lock:
+            return self._lookup_or_create(original_str, type_label, original_value)
+
+    def _lookup_or_create(self, original_str, type_label, original_value):
         c = self.conn.cursor()
         c.execute("SELECT fake_value FROM mapping WHERE original_value = ? AND type = ?", (original_str, type_label))
         row = c.fetchone()
@@ -66,18 +84,23 @@ class Anonymizer:
         elif type_label == 'CREDIT_CARD':
             return self.fake.credit_card_number()
         elif type_label == 'TOKEN':
-            return self.fake.sha256()[:20]
+            if 'TOKEN' in Config.PUSHDOWN_TYPES and Config.PUSHDOWN_KEY:
+                # Same pseudonym as push-down gives this token in any other column
+                return keyed_hash(Config.PUSHDOWN_KEY, original_value)[:TOKEN_LENGTH]
+            return self.fake.sha256()[:TOKEN_LENGTH]
         elif type_label == 'NON_SENSITIVE':
             return str(self.fake.word())
         else:
             return self.fake.word()
 
     def get_mappings(self, limit=100):
-        c = self.conn.cursor()
-        c.execute("SELECT original_value, type, fake_value FROM mapping LIMIT ?", (limit,))
-        rows = c.fetchall()
+        with self._lock:
+            c = self.conn.cursor()
+            c.execute("SELECT original_value, type, fake_value FROM mapping LIMIT ?", (limit,))
+            rows = c.fetchall()
         return rows
 
     def close(self):
         if self.conn:
-            self.conn.close()
+            with self._lock:
+                self.conn.close()
@@ -1 +1,2 @@
 from .connector import DatabaseConnector
+from .bulk import get_bulk_backend
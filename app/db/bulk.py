@@ -0,0 +1,206 @@
+import io
+import logging
+from abc import ABC, abstractmethod
+from sqlalchemy import bindparam, text
+from app.config import Config
+
+class BulkWriteBackend:
+    """
+    Generic bulk writer: one executemany per set of changed columns.
+    Dialect-specific subclasses tune the session and route large batches
+    through a staging table joined back to the target in a single UPDATE.
+    """
+    name = 'generic'
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.logger = logging.getLogger("BulkWriteBackend")
+
+    def prepare(self, conn):
+        """Session tuning applied to every writer connection."""
+        pass
+
+    def write_updates(self, conn, t, pk_cols, updates):
+        """
+        Applies a list of (pk_where, changes) row updates to table `t`.
+        Returns the number of rows written.
+        """
+        for col_names, group in self._group(updates).items():
+            self._executemany_update(conn, t, pk_cols, col_names, group)
+        return len(updates)
+
+    def _group(self, updates):
+        groups = {}
+        for pk_where, changes in updates:
+            groups.setdefault(tuple(changes), []).append((pk_where, changes))
+        return groups
+
+    def _executemany_update(self, conn, t, pk_cols, col_names, group):
+        # Bind names must not clash with column names, hence the positional keys
+        upd_stmt = t.update().values({c: bindparam(f"v_{j}") for j, c in enumerate(col_names)})
+        for i, pk in enumerate(pk_cols):
+            upd_stmt = upd_stmt.where(t.c[pk] == bindparam(f"pk_{i}"))
+
+        params = []
+        for pk_where, changes in group:
+            p = {f"pk_{i}": pk_where[pk] for i, pk in enumerate(pk_cols)}
+            p.update({f"v_{j}": changes[c] for j, c in enumerate(col_names)})
+            params.append(p)
+        conn.execute(upd_stmt, params)
+
+
+class StagingBulkBackend(BulkWriteBackend, ABC):
+    """
+    Loads large batches into a session-private staging table, then applies
+    them with one set-based UPDATE ... JOIN. Small batches fall back to
+    executemany, where the staging round trips would not pay off.
+    """
+    stage_name = 'anon_stage'
+
+    def write_updates(self, conn, t, pk_cols, updates):
+        for col_names, group in self._group(updates).items():
+            if len(group) < Config.BULK_STAGING_MIN_ROWS:
+                self._executemany_update(conn, t, pk_cols, col_names, group)
+            else:
+                self._staged_update(conn, t, pk_cols, col_names, group)
+        return len(updates)
+
+    def _staged_update(self, conn, t, pk_cols, col_names, group):
+        q = conn.dialect.identifier_preparer.quote
+        target = conn.dialect.identifier_preparer.format_table(t)
+        stage_cols = list(pk_cols) + list(col_names)
+        rows = [
+            tuple(pk_where[pk] for pk in pk_cols) + tuple(changes[c] for c in col_names)
+            for pk_where, changes in group
+        ]
+
+        self._create_stage(conn, q, target, pk_cols, col_names)
+        try:
+            self._load_stage(conn, q, stage_cols, rows)
+            conn.execute(text(self._update_sql(q, target, pk_cols, col_names)))
+        except Exception:
+            self._discard_stage(conn)
+            raise
+        conn.execute(text(f"DROP TABLE {self.stage_name}"))
+
+    def _discard_stage(self, conn):
+        """Best-effort cleanup after a failed load/UPDATE; never masks the original error."""
+        try:
+            conn.execute(text(f"DROP TABLE {self.stage_name}"))
+        except Exception as e:
+            self.logger.debug(f"Could not drop {self.stage_name}: {e}")
+
+    def _load_stage(self, conn, q, stage_cols, rows):
+        cols_sql = ", ".join(q(c) for c in stage_cols)
+        values_sql = ", ".join(f":p{i}" for i in range(len(stage_cols)))
+        stmt = text(f"INSERT INTO {self.stage_name} ({cols_sql}) VALUES ({values_sql})")
+        conn.execute(stmt, [{f"p{i}": v for i, v in enumerate(row)} for row in rows])
+
+    @abstractmethod
+    def _create_stage(self, conn, q, target, pk_cols, col_names):
+        """Creates the session-private stage with the key and changed columns."""
+
+    @abstractmethod
+    def _update_sql(self, q, target, pk_cols, col_names):
+        """Returns the UPDATE ... JOIN applying the stage to the target."""
+
+
+class MssqlBulkBackend(StagingBulkBackend):
+    """
+    SQL Server: the engine is created with pyodbc fast_executemany, so the
+    staging load is sent as bulk parameter arrays instead of one round trip
+    per row. A #temp table is used rather than a TVP, which would require a
+    user-defined table type to exist on the server.
+    """
+    name = 'mssql'
+    stage_name = '#anon_stage'
+
+    def _create_stage(self, conn, q, target, pk_cols, col_names):
+        # ISNULL(pk, pk) keeps the key type but drops any IDENTITY property
+        pk_sql = ", ".join(f"ISNULL({q(pk)}, {q(pk)}) AS {q(pk)}" for pk in pk_cols)
+        cols_sql = ", ".join(q(c) for c in col_names)
+        conn.execute(text(f"SELECT TOP 0 {pk_sql}, {cols_sql} INTO {self.stage_name} FROM {target}"))
+
+    def _update_sql(self, q, target, pk_cols, col_names):
+        set_sql = ", ".join(f"t.{q(c)} = s.{q(c)}" for c in col_names)
+        join_sql = " AND ".join(f"t.{q(pk)} = s.{q(pk)}" for pk in pk_cols)
+        return f"UPDATE t SET {set_sql} FROM {target} AS t INNER JOIN {self.stage_name} AS s ON {join_sql}"
+
+
+class PostgresBulkBackend(StagingBulkBackend):
+    """PostgreSQL: staging rows are streamed with COPY FROM STDIN."""
+    name = 'postgresql'
+
+    def _create_stage(self, conn, q, target, pk_cols, col_names):
+        cols_sql = ", ".join(q(c) for c in list(pk_cols) + list(col_names))
+        # ON COMMIT DROP: a failed transaction never needs an explicit DROP
+        conn.execute(text(f"CREATE TEMP TABLE {self.stage_name} ON COMMIT DROP AS SELECT {cols_sql} FROM {target} WITH NO DATA"))
+
+    def _discard_stage(self, conn):
+        # The transaction is aborted (InFailedSqlTransaction on any statement);
+        # its rollback drops the stage
+        pass
+
+    def _load_stage(self, conn, q, stage_cols, rows):
+        driver = self.engine.driver
+        if driver not in ('psycopg2', 'psycopg'):
+            return super()._load_stage(conn, q, stage_cols, rows)
+
+        copy_sql = f"COPY {self.stage_name} ({', '.join(q(c) for c in stage_cols)}) FROM STDIN"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if driver == 'psycopg2':
+                # CSV NULL is an unquoted empty field; every other value is quoted,
+                # so '' stays an empty string
+                buf = io.StringIO("".join(self._csv_line(row) for row in rows))
+                cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv)", buf)
+            else:
+                with cursor.copy(copy_sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _csv_line(row):
+        fields = ('' if v is None else '"' + str(v).replace('"', '""') + '"' for v in row)
+        return ",".join(fields) + "\n"
+
+    def _update_sql(self, q, target, pk_cols, col_names):
+        set_sql = ", ".join(f"{q(c)} = s.{q(c)}" for c in col_names)
+        join_sql = " AND ".join(f"t.{q(pk)} = s.{q(pk)}" for pk in pk_cols)
+        return f"UPDATE {target} AS t SET {set_sql} FROM {self.stage_name} AS s WHERE {join_sql}"
+
+
+class SqliteBulkBackend(BulkWriteBackend):
+    """
+    SQLite: executemany is already in-process, so the gain comes from session
+    pragmas and from keeping all writes in one large transaction.
+    """
+    name = 'sqlite'
+
+    def prepare(self, conn):
+        # Per-connection settings only; nothing persistent is changed in the file
+        conn.exec_driver_sql("PRAGMA cache_size = -200000")
+        conn.exec_driver_sql("PRAGMA temp_store = MEMORY")
+        conn.exec_driver_sql("PRAGMA synchronous = NORMAL")
+
+
+BACKENDS = {
+    'generic': BulkWriteBackend,
+    'mssql': MssqlBulkBackend,
+    'postgresql': PostgresBulkBackend,
+    'sqlite': SqliteBulkBackend,
+}
+
+def get_bulk_backend(engine, name=None):
+    """
+    Returns the bulk write backend for `engine`. `name` (or Config.BULK_BACKEND)
+    forces a specific backend; 'auto' picks one from engine.name.
+    """
+    name = name or Config.BULK_BACKEND
+    if name == 'auto':
+        name = engine.name if engine.name in BACKENDS else 'generic'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown bulk backend '{name}'. Options: {', '.join(BACKENDS)}")
+    return BACKENDS[name](engine)
@@ -1,29 +1,49 @@
 import sqlalchemy
 from sqlalchemy import create_engine, inspect, text, select
+from sqlalchemy.engine import make_url
 from sqlalchemy.schema import MetaData, Table
 from app.config import Config
+from app.db.profiling import ColumnProfiler
 import logging
 
 class DatabaseConnector:
-    def __init__(self):
+    def __init__(self, connection_string=None):
+        self.connection_string = connection_string or Config.DB_CONNECTION_STRING
         self.engine = None
         self.inspector = None
         self.logger = logging.getLogger("DatabaseConnector")
         self.metadata = MetaData()
+        self.profiler = None
 
     def connect(self):
         try:
-            self.engine = create_engine(Config.DB_CONNECTION_STRING)
+            self.engine = create_engine(self.connection_string, **self._engine_options())
             # Test connection
             with self.engine.connect() as conn:
                 pass
             self.inspector = inspect(self.engine)
+            self.profiler = ColumnProfiler(self.engine)
             self.logger.info("Connected to database.")
             return True
         except Exception as e:
             self.logger.error(f"Failed to connect to database: {e}")
             raise
 
+    def _engine_options(self):
+        url = make_url(self.connection_string)
+        options = {}
+        if url.get_backend_name() == 'mssql' and url.get_driver_name() == 'pyodbc':
+            # Send executemany as bulk parameter arrays instead of one round trip per row
+            options['fast_executemany'] = True
+        if url.get_backend_name() != 'sqlite':
+            # Each PK range holds a connection (two with the pipeline's reader), plus one
+            # for the planning/suspension work on the main thread
+            per_worker = 2 if Config.EXECUTION_PIPELINE else 1
+            needed = max(1, Config.EXECUTION_WORKERS) * per_worker + 1
+            options['pool_size'] = max(5, needed)
+            options['max_overflow'] = 10
+        return options
+
     def get_tables(self):
         """Returns list of (schema, table_name)"""
         tables_list = []
@@ -105,10 +125,17 @@ class DatabaseConnector:
             return []
 
     def get_column_stats(self, table_name, column_name, schema=None):
-        """Returns basic stats: null_percentage, unique_ratio"""
+        """
+        Returns basic stats: null_percentage, unique_ratio.
+        Above EXACT_STATS_MAX_ROWS (or with PROFILING_MODE=approx) they are estimates,
+        flagged with estimated/source/error (see ColumnProfiler).
+        """
         try:
+            t = Table(table_name, MetaData(), schema=schema, autoload_with=self.engine)
+            if not self.profiler.use_exact(t):
+                return self.profiler.approximate_stats(t, column_name)
+
             with self.engine.connect() as conn:
-                t = Table(table_name, MetaData(), schema=schema, autoload_with=self.engine)
                 col = t.c[column_name]
 
                 count_query = select(sqlalchemy.func.count()).select_from(t)
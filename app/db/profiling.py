@@ -0,0 +1,264 @@
+import math
+import random
+import logging
+from collections import Counter
+import sqlalchemy
+from sqlalchemy import text, select
+from app.config import Config
+
+class ColumnProfiler:
+    """
+    Approximate column profiling for tables too large for exact COUNT(DISTINCT).
+
+    The row count comes from the catalog (pg_class, sys.dm_db_partition_stats,
+    sqlite_stat1, else an exact COUNT). null_percentage and unique_ratio are read from
+    the database's own statistics when they exist (pg_stats, the SQL Server
+    stats histogram, sqlite_stat1 after ANALYZE); whatever is missing is
+    estimated from a bounded row sample. Every estimate carries its source and
+    an error figure.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.logger = logging.getLogger("ColumnProfiler")
+        self._row_counts = {}
+
+    def use_exact(self, t):
+        """Exact stats only in 'auto' mode and never above EXACT_STATS_MAX_ROWS."""
+        if Config.PROFILING_MODE == 'approx':
+            return False
+        return self.estimate_rows(t) <= Config.EXACT_STATS_MAX_ROWS
+
+    def estimate_rows(self, t):
+        key = (t.schema, t.name)
+        if key not in self._row_counts:
+            rows = None
+            try:
+                rows = self._catalog_rows(t)
+            except Exception as e:
+                self.logger.debug(f"No catalog row count for {t.name}: {e}")
+            if rows is None or rows < 0:
+                with self.engine.connect() as conn:
+                    rows = conn.execute(select(sqlalchemy.func.count()).select_from(t)).scalar()
+            self._row_counts[key] = int(rows)
+        return self._row_counts[key]
+
+    def approximate_stats(self, t, column_name):
+        total_rows = self.estimate_rows(t)
+        if total_rows == 0:
+            return {'null_percentage': 1.0, 'unique_ratio': 0.0, 'total_rows': 0,
+                    'estimated': True, 'source': 'catalog', 'error': {}}
+
+        catalog = {}
+        try:
+            catalog = self._catalog_column_stats(t, column_name, total_rows) or {}
+        except Exception as e:
+            self.logger.debug(f"No catalog stats for {t.name}.{column_name}: {e}")
+
+        stats = {'total_rows': total_rows, 'estimated': True, 'error': {}}
+        if 'null_percentage' in catalog and 'unique_ratio' in catalog:
+            stats.update(catalog)
+        else:
+            sampled = self._sample_stats(t, column_name, total_rows)
+            stats.update(sampled)
+            stats.update(catalog)
+            if 'unique_ratio' in catalog:
+                stats['error'].pop('unique_ratio_factor', None)
+            if catalog:
+                stats['source'] = f"{catalog['source']}+sample"
+
+        err = stats['error']
+        if err.get('unbounded'):
+            self.logger.warning(f"Stats for {t.name}.{column_name} come from the first rows read, "
+                                f"not a random sample; their error is unbounded.")
+        self.logger.info(
+            f"Approximate stats for {t.name}.{column_name} (source: {stats['source']}, ~{total_rows} rows): "
+            f"nulls {stats['null_percentage']:.1%}"
+            + (f" ±{err['null_percentage']:.1%}" if 'null_percentage' in err else "")
+            + f", unique ratio {stats['unique_ratio']:.3f}"
+            + (f" (within x{err['unique_ratio_factor']:.1f})" if 'unique_ratio_factor' in err else ""))
+        return stats
+
+    # --- Catalog -----------------------------------------------------------
+
+    def _catalog_rows(self, t):
+        dialect = self.engine.name
+        target = self.engine.dialect.identifier_preparer.format_table(t)
+        with self.engine.connect() as conn:
+            if dialect == 'postgresql':
+                # reltuples is -1 (PG14+) or 0 before the first ANALYZE/VACUUM
+                rows = conn.execute(text("SELECT reltuples FROM pg_class WHERE oid = CAST(:t AS regclass)"), {'t': target}).scalar()
+                return rows if rows and rows > 0 else None
+            if dialect == 'mssql':
+                return conn.execute(text(
+                    "SELECT SUM(row_count) FROM sys.dm_db_partition_stats "
+                    "WHERE object_id = OBJECT_ID(:t) AND index_id IN (0, 1)"), {'t': target}).scalar()
+            if dialect == 'sqlite':
+                stat = self._sqlite_stat1(conn, t)
+                if stat:
+                    return int(next(iter(stat.values())).split()[0])
+                # Without ANALYZE there is no estimate (max(rowid) is not a row count on
+                # sparse keys): count exactly, once per table, over the smallest index
+                return None
+        return None
+
+    def _catalog_column_stats(self, t, column_name, total_rows):
+        dialect = self.engine.name
+        target = self.engine.dialect.identifier_preparer.format_table(t)
+        with self.engine.connect() as conn:
+            if dialect == 'postgresql':
+                row = conn.execute(text(
+                    "SELECT null_frac, n_distinct FROM pg_stats "
+                    "WHERE schemaname = COALESCE(:s, current_schema()) AND tablename = :t AND attname = :c"),
+                    {'s': t.schema, 't': t.name, 'c': column_name}).first()
+                if row is None:
+                    return None
+                null_frac, n_distinct = row
+                # Negative n_distinct is minus the distinct/rows ratio; positive is an absolute count
+                unique_ratio = -n_distinct if n_distinct < 0 else min(1.0, n_distinct / total_rows)
+                return {'null_percentage': float(null_frac), 'unique_ratio': float(unique_ratio), 'source': 'pg_stats'}
+
+            if dialect == 'mssql':
+                stats_id = conn.execute(text(
+                    "SELECT TOP 1 s.stats_id FROM sys.stats s "
+                    "JOIN sys.stats_columns sc ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id AND sc.stats_column_id = 1 "
+                    "JOIN sys.columns c ON c.object_id = sc.object_id AND c.column_id = sc.column_id "
+                    "WHERE s.object_id = OBJECT_ID(:t) AND c.name = :c ORDER BY s.stats_id"),
+                    {'t': target, 'c': column_name}).scalar()
+                if stats_id is None:
+                    return None
+                # sys.dm_db_stats_histogram: SQL Server 2016 SP1 CU2+ (errors fall back to sampling)
+                row = conn.execute(text(
+                    "SELECT SUM(equal_rows + range_rows), "
+                    "SUM(CASE WHEN range_high_key IS NULL THEN equal_rows ELSE 0 END), "
+                    "SUM(CASE WHEN range_high_key IS NULL THEN 0 ELSE 1 + distinct_range_rows END) "
+                    "FROM sys.dm_db_stats_histogram(OBJECT_ID(:t), :sid)"),
+                    {'t': target, 'sid': stats_id}).first()
+                if not row or not row[0]:
+                    return None
+                hist_rows, null_rows, distinct = (float(v or 0) for v in row)
+                return {'null_percentage': null_rows / hist_rows, 'unique_ratio': min(1.0, distinct / hist_rows),
+                        'source': 'stats_histogram'}
+
+            if dialect == 'sqlite':
+                # sqlite_stat1 "N a ...": N rows, a = average rows per distinct value of the
+                # index's leading column, rounded up: any duplicate makes it >= 2, so only
+                # a == 1 (every value distinct) is exact enough to use. It says nothing
+                # about NULLs (sampled instead).
+                for index_name, stat in self._sqlite_stat1(conn, t).items():
+                    if index_name is None:
+                        continue
+                    info = conn.exec_driver_sql(f"PRAGMA index_info({self.engine.dialect.identifier_preparer.quote(index_name)})").fetchall()
+                    leading = [r for r in info if r[0] == 0]
+                    if leading and leading[0][2] == column_name:
+                        parts = stat.split()
+                        n, per_value = int(parts[0]), int(parts[1])
+                        if per_value != 1:
+                            return None
+                        return {'unique_ratio': min(1.0, n / total_rows), 'source': 'sqlite_stat1'}
+        return None
+
+    def _sqlite_stat1(self, conn, t):
+        """{index name: stat} from sqlite_stat1, empty if ANALYZE never ran."""
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")).scalar()
+        if not exists:
+            return {}
+        rows = conn.execute(text("SELECT idx, stat FROM sqlite_stat1 WHERE tbl = :t"), {'t': t.name}).fetchall()
+        return {idx: stat for idx, stat in rows}
+
+    # --- Sample ------------------------------------------------------------
+
+    def _sample_stats(self, t, column_name, total_rows):
+        """
+        Estimates from at most PROFILE_SAMPLE_ROWS rows. Nulls: sample proportion
+        with its standard error. Distinct values: the GEE estimator
+        sqrt(N/n) * f1 + sum(f_j, j >= 2), whose ratio error is bounded by sqrt(N/n);
+        a sample without any repeated value is taken as a unique column.
+        """
+        values, biased = self._sample_values(t, column_name, total_rows)
+        n = len(values)
+        if n == 0:
+            return {'null_percentage': 0.0, 'unique_ratio': 0.0, 'source': 'sample', 'sample_rows': 0, 'error': {}}
+
+        non_null = [v for v in values if v is not None]
+        p_null = 1 - len(non_null) / n
+        exhaustive = n >= total_rows
+
+        freq = Counter(Counter(non_null).values())  # f_j: values seen exactly j times
+        if exhaustive:
+            distinct = sum(freq.values())
+        elif freq.get(1, 0) == len(non_null):
+            # No value repeats: GEE would put a key column at sqrt(n/N); scale the sample up instead
+            distinct = total_rows * (1 - p_null)
+        else:
+            distinct = math.sqrt(total_rows / n) * freq.get(1, 0) + sum(c for j, c in freq.items() if j >= 2)
+        unique_ratio = min(1.0, distinct / total_rows)
+
+        error = {}
+        if biased and not exhaustive:
+            # Not a probability sample: no standard error applies
+            error['unbounded'] = True
+        elif not exhaustive:
+            fpc = math.sqrt((total_rows - n) / (total_rows - 1)) if total_rows > 1 else 0.0
+            error['null_percentage'] = math.sqrt(p_null * (1 - p_null) / n) * fpc
+            error['unique_ratio_factor'] = math.sqrt(total_rows / n)
+        return {'null_percentage': p_null, 'unique_ratio': unique_ratio, 'source': 'first_rows' if biased else 'sample',
+                'sample_rows': n, 'error': error}
+
+    def _sample_values(self, t, column_name, total_rows):
+        """
+        Returns (values, biased). Reads at most PROFILE_SAMPLE_ROWS values:
+        TABLESAMPLE on PostgreSQL/SQL Server, random PK windows elsewhere. Only
+        when neither applies are the first rows read, flagged as biased (they
+        may follow an index on the column, e.g. NULLs first).
+        """
+        limit = Config.PROFILE_SAMPLE_ROWS
+        col = t.c[column_name]
+        dialect = self.engine.name
+        prep = self.engine.dialect.identifier_preparer
+        target = prep.format_table(t)
+        # Twice the needed fraction, so page-level sampling rarely falls short
+        pct = min(100.0, 200.0 * limit / total_rows) if total_rows else 100.0
+        with self.engine.connect() as conn:
+            if dialect == 'postgresql' and pct < 100:
+                sql = f"SELECT {prep.quote(column_name)} FROM {target} TABLESAMPLE SYSTEM ({pct:.6f}) LIMIT {int(limit)}"
+                return conn.execute(text(sql)).scalars().all(), False
+            if dialect == 'mssql' and pct < 100:
+                sql = f"SELECT TOP ({int(limit)}) {prep.quote(column_name)} FROM {target} TABLESAMPLE ({pct:.6f} PERCENT)"
+                return conn.execute(text(sql)).scalars().all(), False
+            if total_rows <= limit:
+                return conn.execute(select(col)).scalars().all(), False
+            key = self._window_key(t)
+            if key is not None:
+                try:
+                    return self._window_sample(conn, t, col, key, limit), False
+                except Exception as e:
+                    self.logger.debug(f"No PK window sample for {t.name}: {e}")
+            return conn.execute(select(col).limit(limit)).scalars().all(), True
+
+    def _window_key(self, t):
+        """An integer key to draw random windows on: a single-column integer PK, or SQLite's rowid."""
+        pk = list(t.primary_key.columns)
+        if len(pk) == 1 and isinstance(pk[0].type, sqlalchemy.Integer):
+            return pk[0]
+        if self.engine.name == 'sqlite':
+            # Fails (and falls back) on WITHOUT ROWID tables
+            return sqlalchemy.literal_column('rowid')
+        return None
+
+    def _window_sample(self, conn, t, col, key, limit, windows=100):
+        """
+        Reads `windows` short runs of rows starting at random keys, each in key
+        order, so the scan follows the PK and never an index on the column.
+        """
+        low, high = conn.execute(select(sqlalchemy.func.min(key), sqlalchemy.func.max(key)).select_from(t)).one()
+        if low is None:
+            return []
+        per_window = max(1, limit // windows)
+        sampled = {}
+        for _ in range(windows):
+            start = random.randint(low, high)
+            q = select(key, col).select_from(t).where(key >= start).order_by(key).limit(per_window)
+            for k, v in conn.execute(q):
+                sampled[k] = v  # overlapping windows count each row once
+        return list(sampled.values())
@@ -1,11 +1,12 @@
 from app.db import DatabaseConnector
-from app.ml import SensitiveDataClassifier
+from app.ml import SensitiveDataClassifier, create_classifier
 import logging
 
 class SensitiveDiscovery:
-    def __init__(self, db_connector: DatabaseConnector):
+    def __init__(self, db_connector: DatabaseConnector, classifier: SensitiveDataClassifier = None):
         self.db = db_connector
-        self.classifier = SensitiveDataClassifier()
+        # A classifier can be shared between scanners (fan-out runs load the model once)
+        self.classifier = classifier or create_classifier()
         self.logger = logging.getLogger("SensitiveDiscovery")
 
     def scan(self):
@@ -14,6 +15,7 @@ class SensitiveDiscovery:
         Returns a list of dictionaries describing sensitive columns.
         """
         sensitive_columns = []
+        candidates = []
         tables = self.db.get_tables()
 
         print(f"Starting scan on {len(tables)} tables...")
@@ -42,19 +44,26 @@ class SensitiveDiscovery:
                 sql_type_str = str(sql_type_obj)
                 max_size = getattr(sql_type_obj, 'length', 0) or 0
 
-                # Predict
-                label, confidence = self.classifier.predict_column(samples, col_name, sql_type_str, stats, max_size)
-
-                if label != 'NON_SENSITIVE':
-                    self.logger.info(f"Detected {label} in {full_table_name}.{col_name} (Conf: {confidence:.2f})")
-                    sensitive_columns.append({
-                        'schema': schema,
-                        'table': table,
-                        'column': col_name,
-                        'current_type': sql_type,
-                        'sensitive_type': label,
-                        'confidence': confidence,
-                        'sample_value': samples[0] if samples else ""
-                    })
+                candidates.append({
+                    'schema': schema, 'table': table, 'full_table_name': full_table_name,
+                    'samples': samples, 'column_name': col_name, 'sql_type': sql_type_str,
+                    'stats': stats, 'max_size': max_size,
+                })
+
+        # Predict all columns of the schema at once (a single matrix call for the column-level model)
+        predictions = self.classifier.predict_columns(candidates) if candidates else []
+
+        for c, (label, confidence) in zip(candidates, predictions):
+            if label != 'NON_SENSITIVE':
+                self.logger.info(f"Detected {label} in {c['full_table_name']}.{c['column_name']} (Conf: {confidence:.2f})")
+                sensitive_columns.append({
+                    'schema': c['schema'],
+                    'table': c['table'],
+                    'column': c['column_name'],
+                    'current_type': c['sql_type'],
+                    'sensitive_type': label,
+                    'confidence': confidence,
+                    'sample_value': c['samples'][0] if c['samples'] else ""
+                })
 
         return sensitive_columns
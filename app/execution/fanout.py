@@ -0,0 +1,102 @@
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.engine import make_url
+from app.db import DatabaseConnector
+from app.discovery import SensitiveDiscovery
+from app.ml import create_classifier
+from app.anonymization import Anonymizer
+from app.execution.runner import ExecutionEngine
+
+class FanOutRunner:
+    """
+    Runs discovery and execution against several databases concurrently with
+    one shared Anonymizer, so the same original value gets the same fake in
+    every target. Each target keeps its own connection, progress output,
+    metrics, audit log and rollback journal; a refresh takes about as long
+    as the slowest database.
+    """
+
+    def __init__(self, connection_strings, anonymizer: Anonymizer):
+        self.anonymizer = anonymizer
+        self.logger = logging.getLogger("FanOutRunner")
+        self.targets = {}
+        for cs in connection_strings:
+            label = self._label(cs)
+            self.targets[label] = DatabaseConnector(cs)
+        self.metrics = {label: {'status': 'pending'} for label in self.targets}
+        self.total_seconds = 0.0
+
+    def connect(self):
+        """Connects to every target. Returns the labels that failed."""
+        failed = []
+        for label, result in self._run_all(lambda label, db: db.connect()).items():
+            if isinstance(result, Exception):
+                self.logger.error(f"[{label}] Connection failed: {result}")
+                self.metrics[label] = {'status': f"connection failed: {result}"}
+                failed.append(label)
+        return failed
+
+    def discover(self):
+        """Scans every target concurrently. Returns {label: sensitive_columns}."""
+        classifier = create_classifier()
+        plans = {}
+        results = self._run_all(lambda label, db: SensitiveDiscovery(db, classifier).scan())
+        for label, result in results.items():
+            if isinstance(result, Exception):
+                self.logger.error(f"[{label}] Discovery failed: {result}")
+                self.metrics[label] = {'status': f"discovery failed: {result}"}
+            else:
+                plans[label] = result
+        return plans
+
+    def execute(self, plans):
+        """Executes each target's plan concurrently. Returns per-target metrics."""
+        # Engines (and their audit loggers) are created up front, outside the worker threads
+        engines = {label: ExecutionEngine(self.targets[label], self.anonymizer, target=label)
+                   for label, cols in plans.items() if cols}
+
+        def run(label, db):
+            engines[label].execute(plans[label])
+            return engines[label].metrics
+
+        start = time.perf_counter()
+        results = self._run_all(run, only=list(engines))
+        for label, result in results.items():
+            if isinstance(result, Exception):
+                self.metrics[label] = {'status': f"FAILED: {result}", **engines[label].metrics}
+            else:
+                self.metrics[label] = {'status': 'ok', **result}
+        self.total_seconds = time.perf_counter() - start
+        return self.metrics
+
+    def close(self):
+        for db in self.targets.values():
+            db.close()
+
+    def _run_all(self, fn, only=None):
+        """Runs fn(label, db) for every target on its own thread; exceptions are returned, not raised."""
+        labels = only if only is not None else [l for l in self.targets if self.metrics[l]['status'] == 'pending']
+        results = {}
+        if not labels:
+            return results
+        with ThreadPoolExecutor(max_workers=len(labels)) as pool:
+            futures = {label: pool.submit(fn, label, self.targets[label]) for label in labels}
+            for label, future in futures.items():
+                try:
+                    results[label] = future.result()
+                except Exception as e:
+                    results[label] = e
+        return results
+
+    def _label(self, connection_string):
+        url = make_url(connection_string)
+        name = url.database or url.host or url.get_backend_name()
+        # sqlite:///path/crm.db -> crm ; mssql://host/billing -> billing
+        name = re.sub(r'\.(db|sqlite3?)$', '', name.replace('\\', '/').split('/')[-1])
+        label = re.sub(r'[^A-Za-z0-9_.-]', '_', name) or 'db'
+        unique, n = label, 2
+        while unique in self.targets:
+            unique, n = f"{label}_{n}", n + 1
+        return unique
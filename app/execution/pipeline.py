@@ -0,0 +1,107 @@
+import queue
+import threading
+import logging
+
+_DONE = object()
+
+class RowPipeline:
+    """
+    Three-stage read -> transform -> write pipeline for one table or PK range.
+
+    The reader streams chunks on its own connection, the transformer maps them
+    to updates, and the calling thread writes them on its own connection, so the
+    next chunk is fetched while the current one is transformed and the previous
+    one is written. The queues between stages are bounded: a slow stage blocks
+    the one feeding it, keeping at most `depth` chunks in flight per queue.
+    """
+
+    def __init__(self, engine, chunk_size=1000, depth=4, reader_options=None):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.depth = depth
+        self.reader_options = reader_options or {}
+        self.logger = logging.getLogger("RowPipeline")
+
+    def run(self, stmt, transform, write):
+        """
+        Streams the rows of `stmt` through transform(rows) -> chunk and
+        write(chunk) -> count. Returns the sum of the counts. The first error
+        raised by any stage stops the pipeline and is re-raised here.
+        """
+        self._stop = threading.Event()
+        self._errors = []
+        read_q = queue.Queue(maxsize=self.depth)
+        write_q = queue.Queue(maxsize=self.depth)
+
+        reader = threading.Thread(target=self._read, args=(stmt, read_q), name="pipeline-reader", daemon=True)
+        transformer = threading.Thread(target=self._transform, args=(transform, read_q, write_q), name="pipeline-transform", daemon=True)
+        reader.start()
+        transformer.start()
+
+        count = 0
+        try:
+            while True:
+                chunk = self._get(write_q)
+                if chunk is _DONE:
+                    break
+                count += write(chunk)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            reader.join()
+            transformer.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return count
+
+    def _read(self, stmt, out_q):
+        try:
+            with self.engine.connect() as conn:
+                conn = conn.execution_options(stream_results=True, **self.reader_options)
+                result = conn.execute(stmt)
+                while not self._stop.is_set():
+                    rows = result.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    if not self._put(out_q, rows):
+                        break
+                result.close()
+        except Exception as e:
+            self._fail(e)
+        self._put(out_q, _DONE)
+
+    def _transform(self, transform, in_q, out_q):
+        try:
+            while True:
+                rows = self._get(in_q)
+                if rows is _DONE:
+                    break
+                if not self._put(out_q, transform(rows)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        self._put(out_q, _DONE)
+
+    def _fail(self, error):
+        self.logger.error(f"Pipeline stage failed: {error}")
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q, item):
+        # Blocks while the queue is full (backpressure) but gives up once stopped
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
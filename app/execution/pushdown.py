@@ -0,0 +1,139 @@
+import logging
+import sqlalchemy
+from sqlalchemy import text
+from app.config import Config
+from app.anonymization.engine import keyed_hash, TOKEN_LENGTH
+
+class PushdownRewriter:
+    """
+    Rewrites format-only columns entirely on the database server, in chunked
+    UPDATEs, so their values never travel to Python:
+
+    - TOKEN: keyed SHA-256 of the value, lowercase hex, truncated to TOKEN_LENGTH
+      (or the column length). The digest is identical on every dialect for ASCII
+      values and matches what the Anonymizer generates for TOKEN columns left to
+      it, so the same token maps to the same pseudonym everywhere.
+    - CREDIT_CARD: every digit except the last four replaced by '0', keeping
+      separators and length.
+
+    Only string-typed columns outside any unique index or constraint are pushed
+    down (masked cards share their last four digits, truncated digests can
+    collide); anything else goes through the regular Anonymizer path. Other
+    types are pushed down only if every planned column of the type can be
+    (see settle_types).
+    """
+    DIALECTS = ('mssql', 'postgresql', 'sqlite')
+
+    def __init__(self, engine, key=None):
+        self.engine = engine
+        self.key = key if key is not None else Config.PUSHDOWN_KEY
+        self.types = set(Config.PUSHDOWN_TYPES)
+        self.logger = logging.getLogger("PushdownRewriter")
+        self.enabled = bool(self.types)
+        if self.enabled and engine.name not in self.DIALECTS:
+            self.logger.warning(f"Push-down is not supported for {engine.name}; using the regular path.")
+            self.enabled = False
+        if self.enabled and not self.key:
+            # Without a stable key the pseudonyms would differ between runs and databases
+            self.logger.warning("PUSHDOWN_TYPES is set but PUSHDOWN_KEY is not; using the regular path.")
+            self.enabled = False
+
+    def supports(self, t, col_def):
+        return (self.enabled
+                and col_def['sensitive_type'] in self.types
+                and isinstance(t.c[col_def['column']].type, sqlalchemy.String)
+                and not self._is_unique(t, col_def['column']))
+
+    def settle_types(self, columns):
+        """
+        Takes off push-down, for this run, every type some planned column of
+        which cannot be pushed down: a masked card in one table and a Faker card
+        for the same original in another would no longer join. `columns` is the
+        whole plan as (table, col_def) pairs. TOKEN is exempt, the Anonymizer
+        derives the same keyed digest.
+        """
+        for type_label in sorted(self.types - {'TOKEN'}):
+            planned = [(t, c) for t, c in columns if c['sensitive_type'] == type_label]
+            rejected = [f"{t.name}.{c['column']}" for t, c in planned if not self.supports(t, c)]
+            if planned and rejected:
+                self.logger.warning(f"{type_label} is not pushed down this run: {', '.join(rejected)} "
+                                    f"cannot be, and every {type_label} column must get the same fakes.")
+                self.types.discard(type_label)
+
+    def _is_unique(self, t, column):
+        """True if `column` is part of a primary key, unique constraint or unique index."""
+        for constraint in t.constraints:
+            if isinstance(constraint, (sqlalchemy.UniqueConstraint, sqlalchemy.PrimaryKeyConstraint)) \
+                    and column in constraint.columns.keys():
+                return True
+        if any(ix.unique and column in ix.columns.keys() for ix in t.indexes):
+            return True
+        if self.engine.name == 'sqlite':
+            # Inline UNIQUE column constraints are backed by sqlite_autoindex_* indexes, which reflection skips
+            q = self.engine.dialect.identifier_preparer.quote
+            pragma = f"PRAGMA {q(t.schema)}." if t.schema else "PRAGMA "
+            with self.engine.connect() as conn:
+                for ix in conn.exec_driver_sql(f"{pragma}index_list({q(t.name)})").mappings():
+                    if ix['unique'] and column in [r['name'] for r in conn.exec_driver_sql(f"{pragma}index_info({q(ix['name'])})").mappings()]:
+                        return True
+        return False
+
+    def prepare(self, conn):
+        if self.engine.name == 'sqlite':
+            # SQLite has no hash function; register one on this connection (runs inside the engine)
+            conn.connection.dbapi_connection.create_function(
+                'anon_keyed_hash', 2, lambda k, v: keyed_hash(k, v), deterministic=True)
+
+    def build_update(self, t, pk_name, cols, bounds):
+        """Returns (sql, params) for one chunk: UPDATE ... SET col = <expr> WHERE <pk range>."""
+        prep = self.engine.dialect.identifier_preparer
+        target = prep.format_table(t)
+        sets = []
+        for col_def in cols:
+            col = prep.quote(col_def['column'])
+            expr = self._expression(col_def['sensitive_type'], col, t.c[col_def['column']].type.length)
+            sets.append(f"{col} = CASE WHEN {col} IS NULL THEN NULL ELSE {expr} END")
+
+        sql = f"UPDATE {target} SET {', '.join(sets)}"
+        params = {'anon_key': self.key}
+        where = []
+        lower, upper = bounds
+        if lower is not None:
+            where.append(f"{prep.quote(pk_name)} >= :lower")
+            params['lower'] = lower
+        if upper is not None:
+            where.append(f"{prep.quote(pk_name)} < :upper")
+            params['upper'] = upper
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    def rewrite_chunk(self, conn, t, pk_name, cols, bounds):
+        sql, params = self.build_update(t, pk_name, cols, bounds)
+        return conn.execute(text(sql), params).rowcount
+
+    def _expression(self, type_label, col, length):
+        dialect = self.engine.name
+        if type_label == 'TOKEN':
+            size = min(length or TOKEN_LENGTH, TOKEN_LENGTH)
+            if dialect == 'mssql':
+                # CONVERT style 2 gives uppercase hex; the other dialects give lowercase
+                return (f"LEFT(LOWER(CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', "
+                        f"CONCAT(CAST(:anon_key AS VARCHAR(MAX)), CAST({col} AS VARCHAR(MAX)))), 2)), {size})")
+            if dialect == 'postgresql':
+                return f"left(encode(sha256(convert_to(CAST(:anon_key AS text) || {col}, 'UTF8')), 'hex'), {size})"
+            return f"substr(anon_keyed_hash(:anon_key, {col}), 1, {size})"
+
+        if type_label == 'CREDIT_CARD':
+            if dialect == 'mssql':
+                length_fn, head, tail, concat = "LEN", f"LEFT({col}, LEN({col}) - 4)", f"RIGHT({col}, 4)", "+"
+            elif dialect == 'postgresql':
+                length_fn, head, tail, concat = "length", f"left({col}, length({col}) - 4)", f"right({col}, 4)", "||"
+            else:
+                length_fn, head, tail, concat = "length", f"substr({col}, 1, length({col}) - 4)", f"substr({col}, -4)", "||"
+            masked = head
+            for digit in "123456789":
+                masked = f"REPLACE({masked}, '{digit}', '0')"
+            return f"CASE WHEN {length_fn}({col}) > 4 THEN {masked} {concat} {tail} ELSE {col} END"
+
+        raise ValueError(f"No push-down expression for type {type_label}")
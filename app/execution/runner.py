@@ -1,14 +1,29 @@
-from app.db import DatabaseConnector
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.config import Config
+from app.db import DatabaseConnector, get_bulk_backend
 from app.anonymization import Anonymizer
 from app.logging import get_audit_logger
+from app.execution.pipeline import RowPipeline
+from app.execution.suspension import ConstraintSuspender
+from app.execution.pushdown import PushdownRewriter
 from sqlalchemy import text, MetaData, Table, select, inspect
 import sqlalchemy
 
 class ExecutionEngine:
-    def __init__(self, db: DatabaseConnector, anonymizer: Anonymizer):
+    def __init__(self, db: DatabaseConnector, anonymizer: Anonymizer, workers=None, backend=None, target=None):
         self.db = db
         self.anonymizer = anonymizer
-        self.logger = get_audit_logger()
+        # target labels the database in fan-out runs: own audit/rollback files, prefixed output
+        self.target = target
+        self.logger = get_audit_logger(target)
+        self.suspension_journal = Config.target_path(Config.SUSPENSION_JOURNAL_PATH, target)
+        self.metrics = {'tables': 0, 'rows': 0, 'pushdown_rows': 0, 'seconds': 0.0}
+        self.workers = Config.EXECUTION_WORKERS if workers is None else workers
+        # Bulk write backend for the dialect (fast_executemany/COPY staging/SQLite pragmas)
+        self.backend = backend or get_bulk_backend(db.engine)
+        # Server-side rewriting of format-only types (PUSHDOWN_TYPES)
+        self.pushdown = PushdownRewriter(db.engine)
 
     def execute(self, sensitive_columns):
         # Group by table
@@ -19,80 +34,430 @@ class ExecutionEngine:
                 tables[key] = []
             tables[key].append(col)
 
+        self.metrics = {'tables': 0, 'rows': 0, 'pushdown_rows': 0, 'seconds': 0.0}
+        self._settle_pushdown(tables)
+
+        # Never start with objects still suspended by a crashed run
+        suspender = ConstraintSuspender(self.db.engine, self.suspension_journal)
+        suspender.recover()
+
+        suspender = self._suspend_constraints(suspender, tables) if Config.SUSPEND_CONSTRAINTS else None
+        start = time.perf_counter()
+        failed = False
+        try:
+            self._execute_tables(tables)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics['seconds'] = elapsed
+            if suspender:
+                self._restore_constraints(suspender, elapsed, failed)
+
+    def _restore_constraints(self, suspender, elapsed, failed):
+        """
+        Restores suspended objects after execution. A restore failure is raised
+        only when execution itself succeeded, so it never hides the original error.
+        """
+        objects = list(suspender.suspended)
+        self._print("Restoring suspended indexes, constraints and triggers...")
+        try:
+            suspender.restore()
+        except Exception as e:
+            self._print(f"Restore FAILED: {e}")
+            if not failed:
+                raise
+        finally:
+            self._report_suspension(suspender, objects, elapsed)
+
+    def _settle_pushdown(self, tables):
+        """Decides the push-down types for the whole plan at once (see PushdownRewriter.settle_types)."""
+        if not self.pushdown.enabled:
+            return
+        columns = []
+        for (schema, table_name), cols in tables.items():
+            t = Table(table_name, MetaData(), schema=schema, autoload_with=self.db.engine)
+            columns.extend((t, c) for c in cols)
+        self.pushdown.settle_types(columns)
+
+    def _execute_tables(self, tables):
+        if self.workers > 1:
+            # Intra-table parallelism: each PK range runs on its own connection
+            # and commits on its own, so there is no single global transaction.
+            self._print(f"Parallel execution: {self.workers} workers, one transaction per PK range.")
+            for (schema, table_name), cols in tables.items():
+                self._process_table(None, schema, table_name, cols)
+            self._print("Execution completed successfully. Changes committed.")
+            return
+
         with self.db.engine.connect() as conn:
             # Begin Transaction
             trans = conn.begin()
-            print("Transaction started.")
+            self.backend.prepare(conn)
+            self._print("Transaction started.")
             try:
                 for (schema, table_name), cols in tables.items():
                     self._process_table(conn, schema, table_name, cols)
 
                 trans.commit()
-                print("Execution completed successfully. Changes committed.")
+                self._print("Execution completed successfully. Changes committed.")
             except Exception as e:
                 trans.rollback()
-                print(f"Execution FAILED. Rolled back. Error: {e}")
+                self._print(f"Execution FAILED. Rolled back. Error: {e}")
                 # Re-raise to alert caller
                 raise
 
+    def _suspend_constraints(self, suspender, tables):
+        objects = []
+        for (schema, table_name), cols in tables.items():
+            objects.extend(suspender.find(schema, table_name, [c['column'] for c in cols]))
+        self._print(f"Suspending {len(objects)} indexes/constraints/triggers on planned columns...")
+        suspender.suspend(objects)
+        return suspender
+
+    def _report_suspension(self, suspender, objects, elapsed):
+        kinds = {}
+        for obj in objects:
+            kinds[obj['kind']] = kinds.get(obj['kind'], 0) + 1
+        summary = ", ".join(f"{n} {k}" for k, n in sorted(kinds.items())) or "nothing"
+        overhead = suspender.timings['suspend'] + suspender.timings['restore']
+        self._print(f"Constraint suspension: {summary} suspended. "
+              f"Processing {elapsed:.2f}s without maintaining them; "
+              f"suspend {suspender.timings['suspend']:.2f}s + restore/rebuild {suspender.timings['restore']:.2f}s "
+              f"= {overhead:.2f}s overhead.")
+        self.logger.logger.info(f"CONSTRAINT SUSPENSION | {summary} | processing {elapsed:.2f}s | overhead {overhead:.2f}s")
+
     def _process_table(self, conn, schema, table_name, cols):
+        """
+        Anonymizes the planned columns of one table.
+        With a connection, rows are processed inside the caller's transaction.
+        Without one (parallel mode), the table is split into PK ranges that are
+        processed by the worker pool, each committed independently.
+        """
         full_table = f"{schema}.{table_name}" if schema else table_name
-        print(f"Processing table {full_table}...")
+        self._print(f"Processing table {full_table}...")
 
         pk_cols = self._get_pk(table_name, schema)
         if not pk_cols:
-            print(f"Warning: No PK found for {full_table}. Updates require PK. Skipping individual row updates.")
+            self._print(f"Warning: No PK found for {full_table}. Updates require PK. Skipping individual row updates.")
             # Could implement bulk update here if needed, but risky without logging IDs.
             return
 
         t = Table(table_name, MetaData(), schema=schema, autoload_with=self.db.engine)
 
+        push_cols = [c for c in cols if self.pushdown.supports(t, c)]
+        if push_cols:
+            self._pushdown_table(conn, t, pk_cols[0], push_cols, full_table)
+            cols = [c for c in cols if c not in push_cols]
+            if not cols:
+                self.metrics['tables'] += 1
+                return
+
+        if conn is not None:
+            count = self._process_rows(conn, t, pk_cols, cols, full_table)
+        else:
+            ranges = self._plan_ranges(t, pk_cols[0], self._partition_count())
+            count = self._process_ranges(t, pk_cols, cols, full_table, ranges)
+
+        self.metrics['tables'] += 1
+        self.metrics['rows'] += count
+        self._print(f"  Updated {count} rows in {full_table}.")
+
+    def _pushdown_table(self, conn, t, pk_name, cols, full_table):
+        """
+        Rewrites `cols` on the server in chunked UPDATEs over PK ranges. Chunks run
+        in the caller's transaction, or each in its own one in parallel mode.
+        """
+        ranges = self._plan_chunks(t, pk_name, Config.PUSHDOWN_CHUNK_ROWS)
+        names = [c['column'] for c in cols]
+        method = ", ".join(f"{c['column']}={c['sensitive_type']}" for c in cols)
+        self._print(f"  Push-down of {', '.join(names)}: {len(ranges)} server-side chunks...")
+
+        total = 0
+        for idx, bounds in enumerate(ranges, 1):
+            if conn is not None:
+                self.pushdown.prepare(conn)
+                rows = self.pushdown.rewrite_chunk(conn, t, pk_name, cols, bounds)
+            else:
+                with self.db.engine.begin() as chunk_conn:
+                    self.pushdown.prepare(chunk_conn)
+                    rows = self.pushdown.rewrite_chunk(chunk_conn, t, pk_name, cols, bounds)
+            total += rows
+            self.logger.log_chunk_summary(full_table, names, f"{idx}/{len(ranges)}", bounds, rows, method)
+
+        self.metrics['pushdown_rows'] += total
+        self._print(f"  Pushed down {total} rows in {full_table}.")
+        return total
+
+    def _plan_chunks(self, t, pk_name, chunk_rows):
+        """
+        Splits the table into ranges of about `chunk_rows` rows each, by keyset
+        seeks along the PK index (each seek starts from the previous bound), so
+        planning is linear in the table size whatever the key distribution.
+        """
+        col = t.c[pk_name]
+        bounds = [None]
+        with self.db.engine.connect() as conn:
+            while True:
+                cut = self._seek(conn, col, bounds[-1], chunk_rows)
+                if cut is None:
+                    break
+                bounds.append(cut)
+        bounds.append(None)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _seek(self, conn, col, start, offset):
+        """
+        Returns the key `offset` rows past `start` (the first key when None) in PK
+        order, or None past the end.
+        A leading PK column with more than `offset` rows on one value advances
+        to the next value instead, so the cut always moves forward.
+        """
+        if start is None:
+            start = conn.execute(select(sqlalchemy.func.min(col))).scalar()
+            if start is None:
+                return None
+        cut = conn.execute(select(col).where(col >= start).order_by(col).offset(offset).limit(1)).scalar()
+        if cut == start:
+            cut = conn.execute(select(sqlalchemy.func.min(col)).where(col > start)).scalar()
+        return cut
+
+    def plan_units(self, sensitive_columns, partitions=None):
+        """
+        Splits the plan into independent work units: one per table, or one per
+        PK range when partitions > 1. Push-down columns get their own units, one
+        per push-down chunk. Returns (schema, table, cols, bounds) tuples.
+        """
+        tables = {}
+        for col in sensitive_columns:
+            tables.setdefault((col['schema'], col['table']), []).append(col)
+
+        self._settle_pushdown(tables)
+        units = []
+        for (schema, table_name), cols in tables.items():
+            pk_cols = self._get_pk(table_name, schema)
+            if not pk_cols:
+                full_table = f"{schema}.{table_name}" if schema else table_name
+                self._print(f"Warning: No PK found for {full_table}. Updates require PK. Skipping.")
+                continue
+            t = Table(table_name, MetaData(), schema=schema, autoload_with=self.db.engine)
+            # The decision travels with the unit: workers do not see the whole plan
+            cols = [dict(c, pushdown=self.pushdown.supports(t, c)) for c in cols]
+            push_cols = [c for c in cols if c['pushdown']]
+            if push_cols:
+                for bounds in self._plan_chunks(t, pk_cols[0], Config.PUSHDOWN_CHUNK_ROWS):
+                    units.append((schema, table_name, push_cols, bounds))
+                cols = [c for c in cols if c not in push_cols]
+            if cols:
+                for bounds in self._plan_ranges(t, pk_cols[0], partitions or self._partition_count()):
+                    units.append((schema, table_name, cols, bounds))
+        return units
+
+    def process_unit(self, schema, table_name, cols, bounds=(None, None), before_commit=None):
+        """
+        Processes one work unit (a table or one PK range of it) in its own transaction.
+        Push-down columns are rewritten on the server, the rest row by row.
+        before_commit, if given, is called inside the transaction right before it
+        commits; raising from it rolls the unit back.
+        """
+        full_table = f"{schema}.{table_name}" if schema else table_name
+        pk_cols = self._get_pk(table_name, schema)
+        if not pk_cols:
+            self._print(f"Warning: No PK found for {full_table}. Updates require PK. Skipping individual row updates.")
+            return 0
+        t = Table(table_name, MetaData(), schema=schema, autoload_with=self.db.engine)
+        bounds = tuple(bounds)
+        push_cols = [c for c in cols if c.get('pushdown', True) and self.pushdown.supports(t, c)]
+        cols = [c for c in cols if c not in push_cols]
+
+        count = 0
+        with self.db.engine.begin() as conn:
+            if push_cols:
+                self.pushdown.prepare(conn)
+                rows = self.pushdown.rewrite_chunk(conn, t, pk_cols[0], push_cols, bounds)
+                method = ", ".join(f"{c['column']}={c['sensitive_type']}" for c in push_cols)
+                self.logger.log_chunk_summary(full_table, [c['column'] for c in push_cols], "unit", bounds, rows, method)
+                count += rows
+            if cols:
+                self.backend.prepare(conn)
+                count += self._process_rows(conn, t, pk_cols, cols, full_table, bounds)
+            if before_commit:
+                before_commit()
+        return count
+
+    def _partition_count(self):
+        return Config.EXECUTION_PARTITIONS or self.workers
+
+    def _plan_ranges(self, t, pk_name, parts):
+        """
+        Splits the table into disjoint ranges of its leading PK column.
+        Returns a list of (lower, upper) bounds: lower inclusive, upper exclusive,
+        None meaning unbounded, so the ranges always cover the whole table.
+        """
+        if parts <= 1:
+            return [(None, None)]
+
+        col = t.c[pk_name]
+        cuts = []
+        with self.db.engine.connect() as conn:
+            if isinstance(col.type, sqlalchemy.Integer):
+                # Integer keys: split [min, max] evenly, two cheap index lookups
+                low, high = conn.execute(select(sqlalchemy.func.min(col), sqlalchemy.func.max(col))).one()
+                if low is None:
+                    return [(None, None)]
+                step = (high - low + 1) / parts
+                cuts = [low + int(step * i) for i in range(1, parts)]
+            else:
+                # Other orderable keys: quantile boundaries, each seek starting from the previous one
+                total = conn.execute(select(sqlalchemy.func.count()).select_from(t)).scalar()
+                step = -(-total // parts)
+                cut = None
+                for _ in range(1, parts):
+                    cut = self._seek(conn, col, cut, step)
+                    if cut is None:
+                        break
+                    cuts.append(cut)
+
+        # Drop duplicate boundaries (small tables, skewed keys), keeping database order
+        bounds = [None]
+        for cut in cuts:
+            if cut is not None and cut != bounds[-1]:
+                bounds.append(cut)
+        bounds.append(None)
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _process_ranges(self, t, pk_cols, cols, full_table, ranges):
+        workers = min(self.workers, len(ranges))
+        if self.db.engine.name == 'sqlite' and workers > 1:
+            self._print("  SQLite allows a single writer; processing ranges one at a time.")
+            workers = 1
+
+        total = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._process_range, t, pk_cols, cols, full_table, bounds): idx
+                for idx, bounds in enumerate(ranges, 1)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    count = future.result()
+                except Exception as e:
+                    self._print(f"  Range {idx}/{len(ranges)} FAILED and was rolled back. Error: {e}")
+                    errors.append(e)
+                    continue
+                total += count
+                self._print(f"  Range {idx}/{len(ranges)} committed ({count} rows).")
+
+        if errors:
+            # Ranges that committed stay committed; the rollback journal covers them.
+            raise errors[0]
+        return total
+
+    def _process_range(self, t, pk_cols, cols, full_table, bounds):
+        # One connection and one transaction per range
+        with self.db.engine.begin() as conn:
+            self.backend.prepare(conn)
+            return self._process_rows(conn, t, pk_cols, cols, full_table, bounds)
+
+    def _process_rows(self, conn, t, pk_cols, cols, full_table, bounds=(None, None)):
         # Select PKs + Sensitive Cols
         sel_pk = [t.c[pk] for pk in pk_cols]
         sel_cols = [t.c[c['column']] for c in cols]
 
         stmt = select(*(sel_pk + sel_cols))
+        lower, upper = bounds
+        if lower is not None:
+            stmt = stmt.where(sel_pk[0] >= lower)
+        if upper is not None:
+            stmt = stmt.where(sel_pk[0] < upper)
+        # Read in PK order: a scan of a covering index on a column being rewritten
+        # (e.g. email) would otherwise revisit rows as their index entries move.
+        stmt = stmt.order_by(*sel_pk)
+
+        if self._use_pipeline():
+            pipeline = RowPipeline(self.db.engine, Config.EXECUTION_CHUNK_SIZE,
+                                   Config.PIPELINE_QUEUE_DEPTH, self._reader_options())
+            return pipeline.run(
+                stmt,
+                transform=lambda rows: self._transform_chunk(rows, pk_cols, cols, full_table),
+                write=lambda updates: self.backend.write_updates(conn, t, pk_cols, updates),
+            )
 
         # Stream results to handle large tables
         proxy = conn.execution_options(stream_results=True).execute(stmt)
 
+        # Write chunk by chunk through the bulk backend
         count = 0
-        for row in proxy:
-            # Identify Row
-            row_id_parts = [str(row[i]) for i in range(len(pk_cols))]
-            row_id = "-".join(row_id_parts)
-
-            pk_where = {}
-            for i, pk in enumerate(pk_cols):
-                pk_where[pk] = row[i]
-
-            changes = {}
-            offset = len(pk_cols)
-
-            # Calculate changes
-            for i, col_def in enumerate(cols):
-                orig_val = row[offset + i]
-                # Skip if already None? Or anonymize None? Usually None stays None.
-                if orig_val is None:
-                    continue
+        for rows in proxy.partitions(Config.EXECUTION_CHUNK_SIZE):
+            updates = self._transform_chunk(rows, pk_cols, cols, full_table)
+            if updates:
+                count += self.backend.write_updates(conn, t, pk_cols, updates)
+
+        return count
 
-                fake_val = self.anonymizer.get_fake_value(orig_val, col_def['sensitive_type'])
+    def _transform_row(self, row, pk_cols, cols, full_table):
+        """Computes (pk_where, changes) for one selected row and journals each change."""
+        # Identify Row
+        row_id_parts = [str(row[i]) for i in range(len(pk_cols))]
+        row_id = "-".join(row_id_parts)
 
-                if str(fake_val) != str(orig_val):
-                    changes[col_def['column']] = fake_val
-                    # Log
-                    self.logger.log_change(full_table, col_def['column'], row_id, orig_val, fake_val)
+        pk_where = {}
+        for i, pk in enumerate(pk_cols):
+            pk_where[pk] = row[i]
 
+        changes = {}
+        offset = len(pk_cols)
+
+        # Calculate changes
+        for i, col_def in enumerate(cols):
+            orig_val = row[offset + i]
+            # Skip if already None? Or anonymize None? Usually None stays None.
+            if orig_val is None:
+                continue
+
+            fake_val = self.anonymizer.get_fake_value(orig_val, col_def['sensitive_type'])
+
+            if str(fake_val) != str(orig_val):
+                changes[col_def['column']] = fake_val
+                # Log
+                self.logger.log_change(full_table, col_def['column'], row_id, orig_val, fake_val)
+
+        return pk_where, changes
+
+    def _transform_chunk(self, rows, pk_cols, cols, full_table):
+        updates = []
+        for row in rows:
+            pk_where, changes = self._transform_row(row, pk_cols, cols, full_table)
             if changes:
-                # Execute Update for this row
-                upd_stmt = t.update().values(**changes)
-                for pk_col, pk_val in pk_where.items():
-                    upd_stmt = upd_stmt.where(t.c[pk_col] == pk_val)
+                updates.append((pk_where, changes))
+        return updates
+
+    def _use_pipeline(self):
+        if not Config.EXECUTION_PIPELINE:
+            return False
+        if self.db.engine.name == 'sqlite':
+            # The reader's open cursor holds a SHARED lock while it waits on the writer
+            # through the bounded queues; once the writer spills dirty pages it needs an
+            # EXCLUSIVE lock, so neither proceeds. (An in-memory database would not even
+            # be visible to a separate reader connection.)
+            self._print("  SQLite: a separate reader connection would deadlock with the writer; pipeline disabled.")
+            return False
+        return True
 
-                conn.execute(upd_stmt)
-                count += 1
+    def _reader_options(self):
+        if self.db.engine.name == 'mssql':
+            # The reader only reads rows the writer has not reached yet. Under
+            # locking READ COMMITTED it could block on the writer's locks (e.g. after
+            # lock escalation) while the writer waits for the reader's next chunk,
+            # a deadlock the server cannot see because it spans two sessions.
+            return {'isolation_level': 'READ UNCOMMITTED'}
+        return {}
 
-        print(f"  Updated {count} rows in {full_table}.")
+    def _print(self, msg):
+        print(f"[{self.target}] {msg}" if self.target else msg)
 
     def _get_pk(self, table, schema):
         try:
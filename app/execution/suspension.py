@@ -0,0 +1,242 @@
+import json
+import os
+import time
+import logging
+from sqlalchemy import inspect, text, Table, MetaData
+from app.config import Config
+
+class ConstraintSuspender:
+    """
+    Suspends secondary indexes, foreign key checks and triggers that would
+    otherwise be maintained or fired by every row UPDATE, and restores them
+    afterwards.
+
+    Objects are either disabled (SQL Server, PostgreSQL triggers) or dropped and
+    re-created from their captured definition (PostgreSQL indexes and foreign
+    keys, SQLite). Every restore statement is written to a recovery journal,
+    tagged with the database it belongs to, before anything is suspended;
+    recover() replays it after a crash.
+    """
+
+    def __init__(self, engine, journal_path=None):
+        self.engine = engine
+        self.journal_path = journal_path or Config.SUSPENSION_JOURNAL_PATH
+        self.logger = logging.getLogger("ConstraintSuspender")
+        self.suspended = []
+        self.timings = {'suspend': 0.0, 'restore': 0.0}
+
+    def find(self, schema, table_name, columns):
+        """
+        Returns the objects of one table that touch `columns`: non-unique
+        secondary indexes on them, foreign keys constrained by them, and the
+        table's enabled triggers (an UPDATE fires them whatever the column).
+        Unique indexes and primary keys are left in place.
+        """
+        columns = set(columns)
+        insp = inspect(self.engine)
+        prep = self.engine.dialect.identifier_preparer
+        target = prep.format_table(Table(table_name, MetaData(), schema=schema))
+        dialect = self.engine.name
+        objects = []
+
+        def add(kind, name, mode, suspend_sql, restore_sql):
+            objects.append({
+                'schema': schema, 'table': table_name, 'kind': kind, 'name': name,
+                'mode': mode, 'suspend_sql': suspend_sql, 'restore_sql': restore_sql,
+            })
+
+        for ix in insp.get_indexes(table_name, schema=schema):
+            if ix.get('unique') or not columns.intersection(ix.get('column_names') or []):
+                continue
+            if ix.get('dialect_options', {}).get('mssql_clustered'):
+                continue
+            name = ix['name']
+            if dialect == 'mssql':
+                add('index', name, 'disable',
+                    f"ALTER INDEX {prep.quote(name)} ON {target} DISABLE",
+                    f"ALTER INDEX {prep.quote(name)} ON {target} REBUILD")
+            elif dialect in ('postgresql', 'sqlite'):
+                definition = self._index_definition(schema, name)
+                if definition:
+                    add('index', name, 'drop',
+                        f"DROP INDEX {self._qualified(schema, name)}",
+                        definition)
+
+        for fk in insp.get_foreign_keys(table_name, schema=schema):
+            name = fk.get('name')
+            if not name or not columns.intersection(fk.get('constrained_columns') or []):
+                continue
+            if dialect == 'mssql':
+                add('foreign_key', name, 'disable',
+                    f"ALTER TABLE {target} NOCHECK CONSTRAINT {prep.quote(name)}",
+                    f"ALTER TABLE {target} WITH CHECK CHECK CONSTRAINT {prep.quote(name)}")
+            elif dialect == 'postgresql':
+                definition = self._scalar(
+                    "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = CAST(:t AS regclass) AND conname = :n",
+                    t=target, n=name)
+                if definition:
+                    add('foreign_key', name, 'drop',
+                        f"ALTER TABLE {target} DROP CONSTRAINT {prep.quote(name)}",
+                        f"ALTER TABLE {target} ADD CONSTRAINT {prep.quote(name)} {definition}")
+            # SQLite: foreign key enforcement is a per-connection pragma (off by
+            # default) that cannot change inside a transaction; nothing to suspend.
+
+        for name, definition in self._triggers(schema, table_name, target):
+            if dialect == 'mssql':
+                add('trigger', name, 'disable',
+                    f"DISABLE TRIGGER {prep.quote(name)} ON {target}",
+                    f"ENABLE TRIGGER {prep.quote(name)} ON {target}")
+            elif dialect == 'postgresql':
+                add('trigger', name, 'disable',
+                    f"ALTER TABLE {target} DISABLE TRIGGER {prep.quote(name)}",
+                    f"ALTER TABLE {target} ENABLE TRIGGER {prep.quote(name)}")
+            elif dialect == 'sqlite':
+                add('trigger', name, 'drop',
+                    f"DROP TRIGGER {self._qualified(schema, name)}",
+                    definition)
+
+        if dialect not in ('mssql', 'postgresql', 'sqlite'):
+            self.logger.warning(f"Constraint suspension is not supported for {dialect}; nothing suspended.")
+        return objects
+
+    def suspend(self, objects):
+        """Journals the restore statements, then suspends `objects` in one transaction."""
+        if not objects:
+            return
+        start = time.perf_counter()
+        self._write_journal(self.suspended + objects)
+        with self.engine.begin() as conn:
+            for obj in objects:
+                self.logger.info(f"Suspending {obj['kind']} {obj['name']} on {obj['table']}")
+                conn.execute(text(obj['suspend_sql']))
+        self.suspended.extend(objects)
+        self.timings['suspend'] += time.perf_counter() - start
+
+    def restore(self):
+        """
+        Restores (re-enables or rebuilds) everything suspended. Every object is
+        attempted; the ones that fail stay in the journal and a RuntimeError
+        listing them is raised at the end.
+        """
+        start = time.perf_counter()
+        failures = self._restore_objects(self.suspended)
+        self.suspended = []
+        self.timings['restore'] += time.perf_counter() - start
+        if failures:
+            raise RuntimeError(self._failure_summary(failures))
+
+    def recover(self):
+        """
+        Restores objects left suspended by a run that did not finish. Objects
+        that still fail are reported and kept in the journal for the next run.
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path) as f:
+            journal = json.load(f)
+        # Journals written before the database tag was added are a bare list
+        database, pending = (None, journal) if isinstance(journal, list) else (journal['database'], journal['objects'])
+        if database is not None and database != self._database():
+            raise RuntimeError(
+                f"Suspension journal {self.journal_path} belongs to {database}, not {self._database()}. "
+                f"Run against that database to restore its objects, or move the journal away.")
+        if pending:
+            self.logger.warning(f"Recovering {len(pending)} objects left suspended by a previous run.")
+            print(f"[RECOVERY] Restoring {len(pending)} indexes/constraints/triggers left suspended by a previous run...")
+            failures = self._restore_objects(pending)
+            # Still journaled; a later suspend()/restore() on this instance keeps and retries them
+            self.suspended = [obj for obj, _ in failures]
+            if failures:
+                self.logger.error(self._failure_summary(failures))
+                print(f"[RECOVERY] {self._failure_summary(failures)}")
+        else:
+            os.remove(self.journal_path)
+        return len(pending)
+
+    def _restore_objects(self, objects):
+        """Attempts every object; returns [(obj, error)] for the ones left suspended."""
+        failures = []
+        remaining = list(objects)
+        for obj in objects:
+            try:
+                # Disabling is undone idempotently; dropped objects are only re-created
+                # if missing (the crash may have happened before they were dropped).
+                if obj['mode'] == 'disable' or not self._is_present(obj):
+                    self.logger.info(f"Restoring {obj['kind']} {obj['name']} on {obj['table']}")
+                    with self.engine.begin() as conn:
+                        conn.execute(text(obj['restore_sql']))
+            except Exception as e:
+                self.logger.error(f"Could not restore {obj['kind']} {obj['name']} on {obj['table']}: {e}")
+                failures.append((obj, e))
+                continue
+            remaining.remove(obj)
+            self._write_journal(remaining)
+        return failures
+
+    def _failure_summary(self, failures):
+        names = ", ".join(f"{obj['kind']} {obj['name']} on {obj['table']}" for obj, _ in failures)
+        return (f"{len(failures)} objects could not be restored and remain suspended ({names}); "
+                f"they are kept in {self.journal_path} and retried on the next run. First error: {failures[0][1]}")
+
+    def _database(self):
+        return self.engine.url.render_as_string(hide_password=True)
+
+    def _is_present(self, obj):
+        insp = inspect(self.engine)
+        schema, table_name = obj['schema'], obj['table']
+        if obj['kind'] == 'index':
+            return obj['name'] in [ix['name'] for ix in insp.get_indexes(table_name, schema=schema)]
+        if obj['kind'] == 'foreign_key':
+            return obj['name'] in [fk.get('name') for fk in insp.get_foreign_keys(table_name, schema=schema)]
+        target = self.engine.dialect.identifier_preparer.format_table(Table(table_name, MetaData(), schema=schema))
+        return obj['name'] in [name for name, _ in self._triggers(schema, table_name, target, enabled_only=False)]
+
+    def _index_definition(self, schema, name):
+        if self.engine.name == 'postgresql':
+            return self._scalar(
+                "SELECT indexdef FROM pg_indexes WHERE indexname = :n AND schemaname = COALESCE(:s, current_schema())",
+                n=name, s=schema)
+        master = f"{self.engine.dialect.identifier_preparer.quote(schema)}.sqlite_master" if schema else "sqlite_master"
+        return self._scalar(f"SELECT sql FROM {master} WHERE type = 'index' AND name = :n", n=name)
+
+    def _triggers(self, schema, table_name, target, enabled_only=True):
+        """Returns [(name, definition)] for the table's user triggers."""
+        dialect = self.engine.name
+        if dialect == 'mssql':
+            sql = "SELECT name, NULL FROM sys.triggers WHERE parent_id = OBJECT_ID(:t)"
+            if enabled_only:
+                sql += " AND is_disabled = 0"
+            params = {'t': target}
+        elif dialect == 'postgresql':
+            sql = "SELECT tgname, NULL FROM pg_trigger WHERE tgrelid = CAST(:t AS regclass) AND NOT tgisinternal"
+            if enabled_only:
+                sql += " AND tgenabled <> 'D'"
+            params = {'t': target}
+        elif dialect == 'sqlite':
+            master = f"{self.engine.dialect.identifier_preparer.quote(schema)}.sqlite_master" if schema else "sqlite_master"
+            sql = f"SELECT name, sql FROM {master} WHERE type = 'trigger' AND tbl_name = :t"
+            params = {'t': table_name}
+        else:
+            return []
+        with self.engine.connect() as conn:
+            return [tuple(r) for r in conn.execute(text(sql), params)]
+
+    def _qualified(self, schema, name):
+        prep = self.engine.dialect.identifier_preparer
+        return f"{prep.quote(schema)}.{prep.quote(name)}" if schema else prep.quote(name)
+
+    def _scalar(self, sql, **params):
+        with self.engine.connect() as conn:
+            return conn.execute(text(sql), params).scalar()
+
+    def _write_journal(self, objects):
+        if not objects:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        # Write-then-rename so a crash never leaves a truncated journal
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'database': self._database(), 'objects': objects}, f, indent=2)
+        os.replace(tmp_path, self.journal_path)
@@ -4,7 +4,7 @@ import os
 import datetime
 from app.config import Config
 
-_audit_logger_instance = None
+_audit_logger_instances = {}
 
 def setup_logging():
     logging.basicConfig(
@@ -17,29 +17,34 @@ def setup_logging():
     )
 
 class AuditLogger:
-    def __init__(self):
-        self.logger = logging.getLogger("AUDIT")
+    def __init__(self, target=None):
+        # One audit log and rollback journal per target database (fan-out runs)
+        suffix = f".{target}" if target else ""
+        self.audit_path = Config.target_path('audit.log', target)
+        self.rollback_path = Config.target_path('rollback.csv', target)
+
+        self.logger = logging.getLogger("AUDIT" + suffix)
         self.logger.setLevel(logging.INFO)
         self.logger.propagate = False
 
         formatter = logging.Formatter('%(asctime)s | %(message)s')
 
         # File handler for human readable audit
-        fh = logging.FileHandler('audit.log')
+        fh = logging.FileHandler(self.audit_path)
         fh.setFormatter(formatter)
         self.logger.addHandler(fh)
 
         # Rollback logger for data recovery
-        self.rollback_logger = logging.getLogger("ROLLBACK")
+        self.rollback_logger = logging.getLogger("ROLLBACK" + suffix)
         self.rollback_logger.setLevel(logging.INFO)
         self.rollback_logger.propagate = False
-        rh = logging.FileHandler('rollback.csv')
+        rh = logging.FileHandler(self.rollback_path)
         # Simple CSV format for rollback
         rh.setFormatter(logging.Formatter('%(message)s'))
         self.rollback_logger.addHandler(rh)
 
         # Write header to rollback file if empty
-        if os.stat('rollback.csv').st_size == 0:
+        if os.stat(self.rollback_path).st_size == 0:
             self.rollback_logger.info("timestamp|table|column|row_id|original_value|new_value")
 
     def log_change(self, table, column, row_id, original_value, new_value):
@@ -58,14 +63,23 @@ class AuditLogger:
         r_msg = f"{ts}|{table}|{column}|{row_id}|{orig_safe}|{new_safe}"
         self.rollback_logger.info(r_msg)
 
+    def log_chunk_summary(self, table, columns, chunk, bounds, rows, method):
+        """
+        Summary of one server-side (push-down) chunk. Individual values never
+        reach the application, so nothing is written to the rollback journal.
+        """
+        lower, upper = bounds
+        msg = (f"TABLE: {table:<15} | COLS: {', '.join(columns):<15} | CHUNK: {chunk} "
+               f"| RANGE: [{lower}, {upper}) | ROWS: {rows} | METHOD: {method} (server-side, not in rollback)")
+        self.logger.info(msg)
+
     def _mask(self, val):
         s = str(val)
         if len(s) <= 4:
             return '*' * len(s)
         return s[:2] + '*' * (len(s)-4) + s[-2:]
 
-def get_audit_logger():
-    global _audit_logger_instance
-    if _audit_logger_instance is None:
-        _audit_logger_instance = AuditLogger()
-    return _audit_logger_instance
+def get_audit_logger(target=None):
+    if target not in _audit_logger_instances:
+        _audit_logger_instances[target] = AuditLogger(target)
+    return _audit_logger_instances[target]
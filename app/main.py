@@ -7,6 +7,80 @@ from app.discovery import SensitiveDiscovery
 from app.anonymization import Anonymizer
 from app.simulation import SimulationEngine
 from app.execution import ExecutionEngine
+from app.execution.fanout import FanOutRunner
+
+def print_columns(sensitive_cols):
+    for c in sensitive_cols:
+        full_table = f"{c['schema']}.{c['table']}" if c['schema'] else c['table']
+        print(f"  - {full_table:<20} | {c['column']:<15} | Type: {c['sensitive_type']:<10} | Conf: {c['confidence']:.2f}")
+
+def validate_mappings(anonymizer):
+    # "Exibir as primeiras 100 linhas da tabela DE → PARA"
+    print("\n--- SAMPLE MAPPINGS (Existing DE -> PARA) ---")
+    mappings = anonymizer.get_mappings(100)
+    if mappings:
+        print(f"{'ORIGINAL':<30} | {'TYPE':<10} | {'FAKE':<30}")
+        print("-" * 75)
+        for m in mappings:
+            # truncate for display
+            orig = (m[0][:27] + '...') if len(m[0]) > 27 else m[0]
+            fake = (m[2][:27] + '...') if len(m[2]) > 27 else m[2]
+            print(f"{orig:<30} | {m[1]:<10} | {fake:<30}")
+    else:
+        print("  (No mappings exist yet. They will be generated consistently during execution.)")
+
+    confirm = input("\n[?] Is the sample satisfactory? Abort if not. [y/N]: ")
+    if confirm.lower() != 'y':
+        print("Aborted by user.")
+        sys.exit(0)
+
+def main_fan_out(connection_strings):
+    """Same phases as main(), run concurrently against every target with one shared mapping."""
+    anonymizer = Anonymizer()
+    runner = FanOutRunner(connection_strings, anonymizer)
+    print(f"\n[INIT] Fan-out run over {len(runner.targets)} databases: {', '.join(runner.targets)}")
+    failed = runner.connect()
+    if failed:
+        print(f"Error: could not connect to {', '.join(failed)}. Aborting.")
+        runner.close()
+        sys.exit(1)
+
+    print("\n[PHASE 1] Discovery & Classification (all targets)...")
+    plans = runner.discover()
+    for label, cols in plans.items():
+        print(f"\n[RESULT] [{label}] Detected {len(cols)} sensitive columns:")
+        print_columns(cols)
+    if not any(plans.values()):
+        print("No sensitive columns detected.")
+        sys.exit(0)
+
+    print("\n[PHASE 2] Anonymization Logic Validation (shared mapping)...")
+    validate_mappings(anonymizer)
+
+    print("\n[PHASE 3] Simulation (Impact Preview)...")
+    for label, cols in plans.items():
+        if cols:
+            print(f"\n=== [{label}] ===")
+            SimulationEngine(runner.targets[label], anonymizer).simulate(cols)
+
+    print(f"\n[WARNING] You are about to PERMANENTLY modify {len(plans)} databases.")
+    confirm = input("[?] CONFIRM EXECUTION? [y/N]: ")
+    if confirm.lower() != 'y':
+        print("Aborted by user.")
+        sys.exit(0)
+
+    print("\n[PHASE 4] Execution (all targets concurrently)...")
+    metrics = runner.execute(plans)
+
+    print(f"\n{'TARGET':<20} | {'TABLES':>6} | {'ROWS':>10} | {'SECONDS':>8} | STATUS")
+    print("-" * 70)
+    for label, m in metrics.items():
+        print(f"{label:<20} | {m.get('tables', 0):>6} | {m.get('rows', 0):>10} | {m.get('seconds', 0.0):>8.2f} | {m['status']}")
+    print(f"Total wall time: {runner.total_seconds:.2f}s")
+    print("Check 'audit_<target>.log' and 'rollback_<target>.csv' for details.")
+
+    anonymizer.close()
+    runner.close()
 
 def main():
     setup_logging()
@@ -21,7 +95,11 @@ def main():
     if not Config.validate():
         sys.exit(1)
 
-    db = DatabaseConnector()
+    connection_strings = Config.connection_strings()
+    if len(connection_strings) > 1:
+        return main_fan_out(connection_strings)
+
+    db = DatabaseConnector(connection_strings[0])
     try:
         db.connect()
     except Exception as e:
@@ -39,32 +117,12 @@ def main():
         sys.exit(0)
 
     print(f"\n[RESULT] Detected {len(sensitive_cols)} sensitive columns:")
-    for c in sensitive_cols:
-        full_table = f"{c['schema']}.{c['table']}" if c['schema'] else c['table']
-        print(f"  - {full_table:<20} | {c['column']:<15} | Type: {c['sensitive_type']:<10} | Conf: {c['confidence']:.2f}")
+    print_columns(sensitive_cols)
 
     # 3. Anonymization Setup & Validation
     print("\n[PHASE 2] Anonymization Logic Validation...")
     anonymizer = Anonymizer()
-
-    # "Exibir as primeiras 100 linhas da tabela DE → PARA"
-    print("\n--- SAMPLE MAPPINGS (Existing DE -> PARA) ---")
-    mappings = anonymizer.get_mappings(100)
-    if mappings:
-        print(f"{'ORIGINAL':<30} | {'TYPE':<10} | {'FAKE':<30}")
-        print("-" * 75)
-        for m in mappings:
-            # truncate for display
-            orig = (m[0][:27] + '...') if len(m[0]) > 27 else m[0]
-            fake = (m[2][:27] + '...') if len(m[2]) > 27 else m[2]
-            print(f"{orig:<30} | {m[1]:<10} | {fake:<30}")
-    else:
-        print("  (No mappings exist yet. They will be generated consistently during execution.)")
-
-    confirm = input("\n[?] Is the sample satisfactory? Abort if not. [y/N]: ")
-    if confirm.lower() != 'y':
-        print("Aborted by user.")
-        sys.exit(0)
+    validate_mappings(anonymizer)
 
     # 4. Simulation
     print("\n[PHASE 3] Simulation (Impact Preview)...")
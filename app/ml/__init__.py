@@ -1 +1,9 @@
 from .model import SensitiveDataClassifier
+from .column_model import ColumnLevelClassifier
+from app.config import Config
+
+def create_classifier():
+    """Returns the classifier selected by Config.ML_MODEL_KIND."""
+    if Config.ML_MODEL_KIND == 'column':
+        return ColumnLevelClassifier()
+    return SensitiveDataClassifier()
@@ -0,0 +1,155 @@
+import os
+import pickle
+import random
+import logging
+import numpy as np
+from faker import Faker
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+from app.config import Config
+from app.ml.model import value_features, context_features
+
+# Per-value features aggregated over a column's samples (see value_features):
+# mean and variance of the shape/entropy features, match rate of the format flags
+_NUMERIC = slice(0, 5)   # length, pct_digits, pct_alpha, pct_special, entropy
+_FLAGS = slice(5, 9)     # has_at, cpf, cnpj, card
+
+class ColumnLevelClassifier:
+    """
+    Alternative to SensitiveDataClassifier's per-sample voting: the sample
+    features of a column are aggregated into one vector (means and variances
+    of length, character ratios and entropy, regex match rates, distinct
+    ratio), the name/type/stats features are added once, and a single
+    prediction with its probability is made per column.
+    """
+
+    def __init__(self):
+        self.model = None
+        self.scaler = None
+        self.logger = logging.getLogger("ColumnLevelClassifier")
+        self.labels = ['NAME', 'EMAIL', 'CPF_CNPJ', 'PHONE', 'LOGIN', 'TOKEN', 'CREDIT_CARD', 'NON_SENSITIVE']
+        self.model_path = Config.ML_COLUMN_MODEL_PATH
+        self.load_or_train()
+
+    def load_or_train(self):
+        if os.path.exists(self.model_path):
+            try:
+                with open(self.model_path, 'rb') as f:
+                    saved_data = pickle.load(f)
+                    self.model = saved_data['model']
+                    self.scaler = saved_data['scaler']
+                self.logger.info("Loaded existing column-level ML model.")
+            except Exception as e:
+                self.logger.error(f"Failed to load column-level model: {e}. Retraining.")
+                self.train()
+        else:
+            self.logger.info("No column-level model found. Training new model.")
+            self.train()
+
+    def train(self):
+        X, y = self._generate_training_data()
+        self.scaler = StandardScaler()
+        X_scaled = self.scaler.fit_transform(X)
+
+        self.model = LogisticRegression(max_iter=2000)
+        self.model.fit(X_scaled, y)
+
+        with open(self.model_path, 'wb') as f:
+            pickle.dump({'model': self.model, 'scaler': self.scaler}, f)
+        self.logger.info("Column-level model trained and saved.")
+
+    def predict_column(self, samples, column_name, sql_type, stats, max_size=0):
+        """
+        Predicts the class of a column based on samples and metadata.
+        Returns the class label and its predicted probability.
+        """
+        if not samples:
+            return 'NON_SENSITIVE', 1.0
+        return self.predict_columns([{
+            'samples': samples, 'column_name': column_name, 'sql_type': sql_type,
+            'stats': stats, 'max_size': max_size,
+        }])[0]
+
+    def predict_columns(self, columns):
+        """
+        Predicts all `columns` (dicts with the predict_column arguments) with one
+        matrix call. Returns a list of (label, probability) in the same order.
+        """
+        results = [('NON_SENSITIVE', 1.0)] * len(columns)
+        rows = [i for i, c in enumerate(columns) if c['samples']]
+        if not rows:
+            return results
+
+        X = np.array([
+            self._column_features(c['samples'], c['column_name'], c['sql_type'], c['stats'], c.get('max_size', 0))
+            for c in (columns[i] for i in rows)
+        ])
+        proba = self.model.predict_proba(self.scaler.transform(X))
+        best = proba.argmax(axis=1)
+        for i, k, p in zip(rows, best, proba):
+            results[i] = (str(self.model.classes_[k]), float(p[k]))
+        return results
+
+    def _column_features(self, samples, column_name, sql_type, stats, max_size=0):
+        values = [str(v) if v is not None else "" for v in samples]
+        per_value = np.array([value_features(v) for v in values], dtype=float)
+        numeric = per_value[:, _NUMERIC]
+        distinct_ratio = len(set(values)) / len(values)
+        return (
+            list(numeric.mean(axis=0)) + list(numeric.var(axis=0))
+            + list(per_value[:, _FLAGS].mean(axis=0))
+            + [distinct_ratio]
+            + context_features(column_name, sql_type, stats, max_size)
+        )
+
+    def _generate_training_data(self, columns_per_spec=40, seed=42):
+        # Synthetic columns: realistic values from Faker under typical column names.
+        # SQL type, declared size and profile stats are randomized so the model
+        # learns mostly from the values and names rather than from the schema.
+        fake = Faker('pt_BR')
+        fake.seed_instance(seed)
+        rnd = random.Random(seed)
+        text_types = ['VARCHAR', 'NVARCHAR', 'TEXT', 'CHAR']
+        text_sizes = [0, 20, 50, 100, 255]
+        high = (0.2, 1.0)   # unique_ratio range of identifying columns
+        low = (0.0, 0.1)    # unique_ratio range of categorical columns
+
+        # label -> list of (column names, value generator, sql types, sizes, unique_ratio range)
+        specs = {
+            'EMAIL': [(['email', 'user_email', 'contato', 'e_mail', 'mail'], fake.email, text_types, text_sizes, high)],
+            'CPF_CNPJ': [
+                (['cpf', 'documento', 'nr_cpf'], fake.cpf, text_types, text_sizes, high),
+                (['cnpj', 'documento', 'cpf_cnpj'], fake.cnpj, text_types, text_sizes, high),
+                (['cpf', 'documento'], lambda: ''.join(filter(str.isdigit, fake.cpf())), text_types, text_sizes, high),
+            ],
+            'NAME': [(['name', 'full_name', 'nome_completo', 'cliente', 'nome'], fake.name, text_types, text_sizes, high)],
+            'PHONE': [(['phone', 'telefone', 'celular', 'tel_contato'], fake.phone_number, text_types, text_sizes, high)],
+            'CREDIT_CARD': [(['credit_card', 'cartao', 'cc_num', 'card_number'], fake.credit_card_number, text_types, text_sizes, high)],
+            'LOGIN': [(['login', 'username', 'user_login', 'usuario'], fake.user_name, text_types, text_sizes, high)],
+            'TOKEN': [
+                (['token', 'access_token', 'api_key', 'senha_hash'], lambda: fake.sha256()[:rnd.randint(16, 64)], text_types, [0, 64, 255, 2000], high),
+                (['token', 'password', 'session_token'], lambda: fake.password(length=rnd.randint(12, 32)), text_types, [0, 64, 255], high),
+            ],
+            'NON_SENSITIVE': [
+                (['status', 'situacao', 'tipo'], lambda: rnd.choice(['ACTIVE', 'PENDING', 'CLOSED', 'Yes', 'No']), text_types, text_sizes, low),
+                (['created_at', 'updated_at', 'data_cadastro'], lambda: fake.date(), ['DATETIME', 'DATE', 'VARCHAR'], [0, 10], high),
+                (['amount', 'valor', 'price'], lambda: f"{rnd.uniform(0, 10000):.2f}", ['DECIMAL', 'NUMERIC', 'FLOAT'], [0, 10], high),
+                (['id', 'quantity', 'codigo'], lambda: str(rnd.randint(0, 100000)), ['INTEGER', 'BIGINT'], [0, 4, 8], high),
+                (['description', 'descricao', 'observacao'], fake.sentence, text_types, [0, 255, 1000], high),
+                (['category', 'product', 'categoria'], lambda: f"{fake.word().title()} {rnd.randint(1, 9)}", text_types, text_sizes, low),
+            ],
+        }
+
+        data = []
+        labels = []
+        for label, label_specs in specs.items():
+            for names, gen, sql_types, sizes, unique_range in label_specs:
+                for _ in range(columns_per_spec):
+                    # Distinct sampling returns few values from categorical columns
+                    n_samples = rnd.randint(2, 10) if unique_range is low else rnd.randint(2, 50)
+                    samples = [gen() for _ in range(n_samples)]
+                    stats = {'unique_ratio': rnd.uniform(*unique_range), 'null_percentage': rnd.uniform(0, 0.3)}
+                    data.append(self._column_features(samples, rnd.choice(names), rnd.choice(sql_types), stats, rnd.choice(sizes)))
+                    labels.append(label)
+
+        return np.array(data), labels
@@ -9,6 +9,65 @@ from sklearn.preprocessing import StandardScaler
 from app.config import Config
 import logging
 
+def value_features(val_str):
+    """Features of a single value: shape, entropy and format flags."""
+    # 1. Value Features
+    length = len(val_str)
+    n_digits = sum(c.isdigit() for c in val_str)
+    n_alpha = sum(c.isalpha() for c in val_str)
+    n_special = length - n_digits - n_alpha
+
+    pct_digits = n_digits / length if length > 0 else 0
+    pct_alpha = n_alpha / length if length > 0 else 0
+    pct_special = n_special / length if length > 0 else 0
+
+    # Shannon Entropy
+    entropy = 0
+    if length > 0:
+        prob = [float(val_str.count(c)) / length for c in dict.fromkeys(list(val_str))]
+        entropy = - sum([p * math.log(p) / math.log(2.0) for p in prob])
+
+    # Regex Flags (Boolean as 0/1)
+    has_at = 1 if '@' in val_str else 0
+    has_cpf_format = 1 if re.search(r'\d{3}\.\d{3}\.\d{3}-\d{2}', val_str) else 0
+    has_cnpj_format = 1 if re.search(r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}', val_str) else 0
+    has_card_format = 1 if re.search(r'\d{4}.?\d{4}.?\d{4}.?\d{4}', val_str) else 0
+
+    return [
+        length, pct_digits, pct_alpha, pct_special, entropy,
+        has_at, has_cpf_format, has_cnpj_format, has_card_format,
+    ]
+
+def context_features(column_name, sql_type, stats, max_size=0):
+    """Features of the column itself: name hints, profile stats and SQL type."""
+    # 2. Column Features
+    col_lower = column_name.lower()
+    name_has_email = 1 if 'email' in col_lower or 'mail' in col_lower else 0
+    name_has_name = 1 if 'name' in col_lower or 'nome' in col_lower else 0
+    name_has_cpf = 1 if 'cpf' in col_lower else 0
+    name_has_cnpj = 1 if 'cnpj' in col_lower else 0
+    name_has_phone = 1 if 'phone' in col_lower or 'cel' in col_lower or 'tel' in col_lower else 0
+    name_has_login = 1 if 'login' in col_lower or 'user' in col_lower else 0
+    name_has_pass = 1 if 'pass' in col_lower or 'senh' in col_lower or 'token' in col_lower else 0
+
+    # 3. Contextual Features
+    unique_ratio = stats.get('unique_ratio', 0)
+    null_percentage = stats.get('null_percentage', 0)
+
+    # 4. Mandatory SQL Features
+    type_str = str(sql_type).lower()
+    is_char = 1 if 'char' in type_str or 'text' in type_str or 'string' in type_str else 0
+    is_int = 1 if 'int' in type_str else 0
+    is_float = 1 if 'float' in type_str or 'real' in type_str or 'decimal' in type_str or 'numeric' in type_str or 'money' in type_str else 0
+
+    size_feat = math.log(max_size + 1) if max_size > 0 else 0
+
+    return [
+        name_has_email, name_has_name, name_has_cpf, name_has_cnpj, name_has_phone, name_has_login, name_has_pass,
+        unique_ratio, null_percentage,
+        is_char, is_int, is_float, size_feat
+    ]
+
 class SensitiveDataClassifier:
     def __init__(self):
         self.model = None
@@ -75,61 +134,20 @@ class SensitiveDataClassifier:
 
         return most_common, confidence
 
-    def _extract_features(self, value, column_name, sql_type, stats, max_size=0):
-        val_str = str(value) if value is not None else ""
-
-        # 1. Value Features
-        length = len(val_str)
-        n_digits = sum(c.isdigit() for c in val_str)
-        n_alpha = sum(c.isalpha() for c in val_str)
-        n_special = length - n_digits - n_alpha
-
-        pct_digits = n_digits / length if length > 0 else 0
-        pct_alpha = n_alpha / length if length > 0 else 0
-        pct_special = n_special / length if length > 0 else 0
-
-        # Shannon Entropy
-        entropy = 0
-        if length > 0:
-            prob = [float(val_str.count(c)) / length for c in dict.fromkeys(list(val_str))]
-            entropy = - sum([p * math.log(p) / math.log(2.0) for p in prob])
-
-        # Regex Flags (Boolean as 0/1)
-        has_at = 1 if '@' in val_str else 0
-        has_cpf_format = 1 if re.search(r'\d{3}\.\d{3}\.\d{3}-\d{2}', val_str) else 0
-        has_cnpj_format = 1 if re.search(r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}', val_str) else 0
-        has_card_format = 1 if re.search(r'\d{4}.?\d{4}.?\d{4}.?\d{4}', val_str) else 0
-
-        # 2. Column Features
-        col_lower = column_name.lower()
-        name_has_email = 1 if 'email' in col_lower or 'mail' in col_lower else 0
-        name_has_name = 1 if 'name' in col_lower or 'nome' in col_lower else 0
-        name_has_cpf = 1 if 'cpf' in col_lower else 0
-        name_has_cnpj = 1 if 'cnpj' in col_lower else 0
-        name_has_phone = 1 if 'phone' in col_lower or 'cel' in col_lower or 'tel' in col_lower else 0
-        name_has_login = 1 if 'login' in col_lower or 'user' in col_lower else 0
-        name_has_pass = 1 if 'pass' in col_lower or 'senh' in col_lower or 'token' in col_lower else 0
-
-        # 3. Contextual Features
-        unique_ratio = stats.get('unique_ratio', 0)
-        null_percentage = stats.get('null_percentage', 0)
-
-        # 4. Mandatory SQL Features
-        type_str = str(sql_type).lower()
-        is_char = 1 if 'char' in type_str or 'text' in type_str or 'string' in type_str else 0
-        is_int = 1 if 'int' in type_str else 0
-        is_float = 1 if 'float' in type_str or 'real' in type_str or 'decimal' in type_str or 'numeric' in type_str or 'money' in type_str else 0
-
-        size_feat = math.log(max_size + 1) if max_size > 0 else 0
-
+    def predict_columns(self, columns):
+        """
+        Predicts several columns. `columns` is a list of dicts with the
+        predict_column arguments (samples, column_name, sql_type, stats, max_size).
+        """
         return [
-            length, pct_digits, pct_alpha, pct_special, entropy,
-            has_at, has_cpf_format, has_cnpj_format, has_card_format,
-            name_has_email, name_has_name, name_has_cpf, name_has_cnpj, name_has_phone, name_has_login, name_has_pass,
-            unique_ratio, null_percentage,
-            is_char, is_int, is_float, size_feat
+            self.predict_column(c['samples'], c['column_name'], c['sql_type'], c['stats'], c.get('max_size', 0))
+            for c in columns
         ]
 
+    def _extract_features(self, value, column_name, sql_type, stats, max_size=0):
+        val_str = str(value) if value is not None else ""
+        return value_features(val_str) + context_features(column_name, sql_type, stats, max_size)
+
     def _generate_training_data(self):
         # Synthetic Data Generation
         data = []
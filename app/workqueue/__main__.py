@@ -0,0 +1,190 @@
+"""
+Work queue commands.
+
+    python -m app.workqueue enqueue [--partitions N] [--yes]   discover and enqueue work units
+    python -m app.workqueue worker [--id NAME] [--wait]        claim and process units
+    python -m app.workqueue status [--watch SECONDS]           queue depth, throughput, ETA
+
+All commands use WORKQUEUE_PATH (or --queue). Workers on other hosts must
+share the queue file and ANONYMIZATION_DB_PATH, on a filesystem with working
+SQLite locking, so they resolve the same fakes, and the same PUSHDOWN_TYPES and
+PUSHDOWN_KEY, so push-down units are rewritten the same way as in-process runs.
+SUSPEND_CONSTRAINTS is not applied by workers: no single process knows when
+the last unit finishes and the objects can be restored.
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import logging
+
+from app.config import Config
+from app.logging import setup_logging
+from app.workqueue import WorkQueue
+
+def cmd_enqueue(args):
+    from app.db import DatabaseConnector
+    from app.discovery import SensitiveDiscovery
+    from app.anonymization import Anonymizer
+    from app.execution import ExecutionEngine
+
+    from app.execution.suspension import ConstraintSuspender
+
+    db = DatabaseConnector(Config.connection_strings()[0])
+    db.connect()
+    # Workers must not run against objects left suspended by a crashed in-process run
+    ConstraintSuspender(db.engine).recover()
+    if Config.SUSPEND_CONSTRAINTS:
+        print("[!] SUSPEND_CONSTRAINTS is ignored by queue workers; indexes, FK checks and triggers stay active.")
+    sensitive_cols = SensitiveDiscovery(db).scan()
+    if not sensitive_cols:
+        print("No sensitive columns detected.")
+        return
+
+    print(f"\n[RESULT] Detected {len(sensitive_cols)} sensitive columns:")
+    for c in sensitive_cols:
+        full_table = f"{c['schema']}.{c['table']}" if c['schema'] else c['table']
+        print(f"  - {full_table:<20} | {c['column']:<15} | Type: {c['sensitive_type']:<10} | Conf: {c['confidence']:.2f}")
+
+    anonymizer = Anonymizer()
+    units = ExecutionEngine(db, anonymizer, workers=1).plan_units(sensitive_cols, args.partitions)
+    anonymizer.close()
+    db.close()
+
+    if not args.yes:
+        confirm = input(f"\n[?] Enqueue {len(units)} work units into {args.queue}? Workers will PERMANENTLY modify the database. [y/N]: ")
+        if confirm.lower() != 'y':
+            print("Aborted by user.")
+            return
+
+    queue = WorkQueue(args.queue)
+    queue.enqueue(units)
+    queue.close()
+    print(f"Enqueued {len(units)} work units.")
+
+def cmd_worker(args):
+    from app.db import DatabaseConnector
+    from app.anonymization import Anonymizer
+    from app.execution import ExecutionEngine
+
+    logger = logging.getLogger("Worker")
+    queue = WorkQueue(args.queue)
+    db = DatabaseConnector(Config.connection_strings()[0])
+    db.connect()
+    anonymizer = Anonymizer()
+    engine = ExecutionEngine(db, anonymizer, workers=1, target=args.id)
+    print(f"Worker {args.id} started on queue {args.queue}.")
+
+    processed = 0
+    try:
+        while True:
+            unit = queue.claim(args.id, args.lease)
+            if unit is None:
+                if args.wait or queue.has_open_units():
+                    # Open units are leased elsewhere; their leases may still expire
+                    time.sleep(args.poll)
+                    continue
+                break
+
+            lower, upper = unit['bounds']
+            print(f"[{args.id}] Unit {unit['id']}: {unit['table']} [{lower}, {upper}) (attempt {unit['attempt']})")
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_renew_lease, args=(args.queue, unit['id'], args.id, args.lease, stop), daemon=True)
+            heartbeat.start()
+            try:
+                rows = engine.process_unit(unit['schema'], unit['table'], unit['cols'], unit['bounds'],
+                                           before_commit=lambda: _check_lease(queue, unit['id'], args.id, args.lease))
+            except Exception as e:
+                logger.error(f"Unit {unit['id']} failed: {e}")
+                queue.fail(unit['id'], args.id, e)
+                continue
+            finally:
+                stop.set()
+                heartbeat.join()
+            queue.complete(unit['id'], args.id, rows)
+            processed += 1
+    finally:
+        anonymizer.close()
+        db.close()
+        queue.close()
+    print(f"Worker {args.id} finished: {processed} units processed.")
+
+def _check_lease(queue, unit_id, worker, lease_seconds):
+    # Last renewal inside the unit's transaction: a worker whose lease expired must not
+    # commit, or two workers could rewrite the same range (the second reading fakes as originals)
+    if not queue.renew(unit_id, worker, lease_seconds):
+        raise RuntimeError(f"Lost lease on unit {unit_id} before commit; rolled back.")
+
+def _renew_lease(queue_path, unit_id, worker, lease_seconds, stop):
+    # Own connection: the worker's connection stays single-threaded
+    queue = WorkQueue(queue_path)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.renew(unit_id, worker, lease_seconds):
+                logging.getLogger("Worker").warning(f"Lost lease on unit {unit_id}; it may be processed again.")
+                return
+    finally:
+        queue.close()
+
+def cmd_status(args):
+    queue = WorkQueue(args.queue)
+    try:
+        while True:
+            _print_status(queue.stats())
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+
+def _print_status(stats):
+    depth = stats['depth']
+    print(f"\n[{time.strftime('%H:%M:%S')}] QUEUE: " + " | ".join(
+        f"{status}: {depth.get(status, 0)}" for status in ('pending', 'leased', 'done', 'failed')))
+    if stats['workers']:
+        print(f"{'WORKER':<30} | {'UNITS':>6} | {'ROWS':>10} | {'ROWS/SEC':>9} | ACTIVE")
+        print("-" * 72)
+        for worker, w in sorted(stats['workers'].items()):
+            print(f"{worker:<30} | {w['units']:>6} | {w['rows']:>10} | {w['rows_per_sec']:>9.0f} | {'yes' if w['active'] else 'no'}")
+    eta = stats['eta_seconds']
+    if stats['remaining'] == 0:
+        print("ETA: queue drained.")
+    else:
+        print(f"Remaining units: {stats['remaining']} | ETA: " + (f"{eta:.0f}s" if eta is not None else "unknown (no unit finished yet)"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.workqueue", description="Durable work queue for distributed execution.")
+    parser.add_argument('--queue', default=Config.WORKQUEUE_PATH, help="Queue file (default: WORKQUEUE_PATH)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('enqueue', help="Run discovery and enqueue work units")
+    p.add_argument('--partitions', type=int, default=None, help="PK ranges per table (default: EXECUTION_PARTITIONS or 1)")
+    p.add_argument('--yes', action='store_true', help="Do not ask for confirmation")
+    p.set_defaults(func=cmd_enqueue)
+
+    p = sub.add_parser('worker', help="Claim and process units until the queue is drained")
+    p.add_argument('--id', default=f"{socket.gethostname()}-{os.getpid()}", help="Worker name (default: host-pid)")
+    p.add_argument('--lease', type=int, default=Config.WORKQUEUE_LEASE_SECONDS, help="Lease duration in seconds")
+    p.add_argument('--poll', type=float, default=2.0, help="Seconds between claim attempts while waiting")
+    p.add_argument('--wait', action='store_true', help="Keep polling for new units instead of exiting")
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser('status', help="Show queue depth, per-worker throughput and ETA")
+    p.add_argument('--watch', type=float, default=0, help="Refresh every N seconds")
+    p.set_defaults(func=cmd_status)
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    if args.command != 'status' and not Config.validate():
+        sys.exit(1)
+    if args.command != 'status' and len(Config.connection_strings()) > 1:
+        print("The work queue runs against a single database; set one entry in DB_CONNECTION_STRINGS.")
+        sys.exit(1)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
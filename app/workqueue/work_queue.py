@@ -0,0 +1,154 @@
+import json
+import sqlite3
+import time
+import logging
+from app.config import Config
+
+class WorkQueue:
+    """
+    Durable SQLite-backed queue of execution work units (a table or a PK range).
+
+    Any number of worker processes, on this host or on others sharing the file,
+    claim units under a time-limited lease, renew it while working and mark the
+    unit done. A unit whose lease expires (crashed or stalled worker) is claimed
+    again by the next worker, up to WORKQUEUE_MAX_ATTEMPTS times. Workers renew
+    the lease inside the unit's transaction right before committing and roll
+    back if it was lost, so a range expired under one worker is only ever
+    committed by the worker that reclaimed it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.WORKQUEUE_PATH
+        self.logger = logging.getLogger("WorkQueue")
+        # isolation_level=None: transactions are managed explicitly below
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS units
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      schema_name TEXT, table_name TEXT, columns TEXT,
+                      lower_bound TEXT, upper_bound TEXT,
+                      status TEXT NOT NULL DEFAULT 'pending',
+                      worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0,
+                      rows INTEGER, error TEXT,
+                      enqueued_at REAL, started_at REAL, finished_at REAL)''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_units_status ON units (status, id)")
+
+    def _begin(self):
+        # IMMEDIATE takes the write lock up front so two workers never claim the same unit
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, units):
+        """Adds (schema, table, cols, bounds) units. Returns the number enqueued."""
+        now = time.time()
+        self._begin()
+        try:
+            for schema, table_name, cols, (lower, upper) in units:
+                self.conn.execute(
+                    "INSERT INTO units (schema_name, table_name, columns, lower_bound, upper_bound, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (schema, table_name, json.dumps(cols), json.dumps(lower, default=str),
+                     json.dumps(upper, default=str), now))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return len(units)
+
+    def claim(self, worker, lease_seconds=None):
+        """
+        Leases the next pending (or lease-expired) unit to `worker`.
+        Returns a dict describing the unit, or None if nothing is claimable.
+        """
+        lease_seconds = lease_seconds or Config.WORKQUEUE_LEASE_SECONDS
+        now = time.time()
+        self._begin()
+        try:
+            # Expired leases past the attempt limit are given up on
+            self.conn.execute(
+                "UPDATE units SET status = 'failed', error = COALESCE(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, Config.WORKQUEUE_MAX_ATTEMPTS))
+            row = self.conn.execute(
+                "SELECT id, schema_name, table_name, columns, lower_bound, upper_bound, attempts, worker, status "
+                "FROM units WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            if row[8] == 'leased':
+                self.logger.warning(f"Reclaiming unit {row[0]} from {row[7]} (lease expired).")
+            self.conn.execute(
+                "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started_at = ?, error = NULL WHERE id = ?",
+                (worker, now + lease_seconds, now, row[0]))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return {
+            'id': row[0],
+            'schema': row[1],
+            'table': row[2],
+            'cols': json.loads(row[3]),
+            'bounds': (json.loads(row[4]), json.loads(row[5])),
+            'attempt': row[6] + 1,
+        }
+
+    def renew(self, unit_id, worker, lease_seconds=None):
+        """Extends the lease. Returns False if the unit is no longer leased to `worker`."""
+        lease_seconds = lease_seconds or Config.WORKQUEUE_LEASE_SECONDS
+        cur = self.conn.execute(
+            "UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease_seconds, unit_id, worker))
+        return cur.rowcount == 1
+
+    def complete(self, unit_id, worker, rows):
+        self.conn.execute(
+            "UPDATE units SET status = 'done', rows = ?, finished_at = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ?",
+            (rows, time.time(), unit_id, worker))
+
+    def fail(self, unit_id, worker, error):
+        """Returns the unit to the queue, or marks it failed after the last attempt."""
+        self.conn.execute(
+            "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_expires = NULL, finished_at = ? WHERE id = ? AND worker = ?",
+            (Config.WORKQUEUE_MAX_ATTEMPTS, str(error)[:1000], time.time(), unit_id, worker))
+
+    def has_open_units(self):
+        """True while any unit is pending or leased."""
+        row = self.conn.execute("SELECT COUNT(*) FROM units WHERE status IN ('pending', 'leased')").fetchone()
+        return row[0] > 0
+
+    def stats(self):
+        """Queue depth by status, per-worker throughput and an ETA for the remaining units."""
+        now = time.time()
+        depth = dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall())
+
+        workers = {}
+        for worker, units, rows, busy in self.conn.execute(
+                "SELECT worker, COUNT(*), COALESCE(SUM(rows), 0), SUM(finished_at - started_at) "
+                "FROM units WHERE status = 'done' GROUP BY worker"):
+            workers[worker] = {'units': units, 'rows': rows, 'busy_seconds': busy or 0.0,
+                               'rows_per_sec': rows / busy if busy else 0.0, 'active': False}
+        for worker, lease_expires in self.conn.execute(
+                "SELECT worker, lease_expires FROM units WHERE status = 'leased'"):
+            w = workers.setdefault(worker, {'units': 0, 'rows': 0, 'busy_seconds': 0.0,
+                                            'rows_per_sec': 0.0, 'active': False})
+            w['active'] = w['active'] or lease_expires >= now
+
+        # ETA: remaining units at the observed mean unit duration, spread over active workers
+        done = depth.get('done', 0)
+        remaining = depth.get('pending', 0) + depth.get('leased', 0)
+        busy_total = sum(w['busy_seconds'] for w in workers.values())
+        active = sum(1 for w in workers.values() if w['active']) or 1
+        eta = (busy_total / done) * remaining / active if done else None
+
+        return {'depth': depth, 'workers': workers, 'remaining': remaining, 'eta_seconds': eta}
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
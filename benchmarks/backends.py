@@ -0,0 +1,133 @@
+"""
+End-to-end execution benchmark comparing bulk write backends.
+
+Builds a synthetic customers table, runs ExecutionEngine over it once per
+backend (each run on a fresh copy of the table and a fresh mapping) and
+reports rows/sec. With --suspend every backend also runs with
+SUSPEND_CONSTRAINTS on, showing the time saved by not maintaining the
+secondary indexes on the planned columns.
+
+    python -m benchmarks.backends --rows 20000
+    python -m benchmarks.backends --rows 20000 --suspend
+    python -m benchmarks.backends --url postgresql+psycopg2://user:pw@host/scratch --backends generic postgresql
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from faker import Faker
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, insert
+
+from app.config import Config
+
+TABLE_NAME = 'bench_customers'
+
+PLAN = [
+    ('full_name', 'NAME'),
+    ('email', 'EMAIL'),
+    ('cpf', 'CPF_CNPJ'),
+    ('phone', 'PHONE'),
+]
+
+def build_table(engine, rows, seed):
+    """(Re)creates the benchmark table with `rows` deterministic rows."""
+    metadata = MetaData()
+    t = Table(
+        TABLE_NAME, metadata,
+        Column('id', Integer, primary_key=True, autoincrement=False),
+        Column('full_name', String(100)),
+        Column('email', String(100)),
+        Column('cpf', String(20)),
+        Column('phone', String(30)),
+        # Secondary indexes on sensitive columns, as commonly found in production
+        Index('ix_bench_email', 'email'),
+        Index('ix_bench_cpf', 'cpf'),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    fake = Faker('pt_BR')
+    fake.seed_instance(seed)
+    # A fixed population repeated over the rows, like real data with duplicates
+    population = [(fake.name(), fake.email(), fake.cpf(), fake.phone_number()) for _ in range(max(1, rows // 5))]
+    rnd = random.Random(seed)
+    data = []
+    for i in range(1, rows + 1):
+        name, email, cpf, phone = rnd.choice(population)
+        data.append({'id': i, 'full_name': name, 'email': email, 'cpf': cpf, 'phone': phone})
+
+    with engine.begin() as conn:
+        for start in range(0, len(data), 5000):
+            conn.execute(insert(t), data[start:start + 5000])
+    return t
+
+def run_backend(db, backend_name, rows, seed, workdir, suspend=False):
+    from app.anonymization import Anonymizer
+    from app.db import get_bulk_backend
+    from app.execution import ExecutionEngine
+
+    t = build_table(db.engine, rows, seed)
+    Config.ANONYMIZATION_DB_PATH = os.path.join(workdir, f"mapping_{backend_name}_{int(suspend)}.db")
+    Config.SUSPEND_CONSTRAINTS = suspend
+    anonymizer = Anonymizer()
+    anonymizer.fake.seed_instance(seed)
+
+    cols = [
+        {'schema': None, 'table': TABLE_NAME, 'column': c, 'sensitive_type': s}
+        for c, s in PLAN
+    ]
+    engine = ExecutionEngine(db, anonymizer, backend=get_bulk_backend(db.engine, backend_name))
+
+    start = time.perf_counter()
+    engine.execute(cols)
+    elapsed = time.perf_counter() - start
+
+    anonymizer.close()
+    t.drop(db.engine)
+    return elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare bulk write backends end to end.")
+    parser.add_argument('--url', help="SQLAlchemy URL of a scratch database (default: temporary SQLite file)")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--backends', nargs='+', help="Backends to compare (default: generic + the dialect's own)")
+    parser.add_argument('--suspend', action='store_true', help="Also run each backend with index/constraint suspension")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="anon_bench_")
+    # Audit and rollback files are written to the working directory
+    os.chdir(workdir)
+    Config.DB_CONNECTION_STRING = args.url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app.db import DatabaseConnector
+    from app.db.bulk import BACKENDS
+    db = DatabaseConnector()
+    db.connect()
+
+    backends = args.backends or ['generic'] + ([db.engine.name] if db.engine.name in BACKENDS else [])
+    results = []
+    for name in backends:
+        for suspend in ([False, True] if args.suspend else [False]):
+            label = f"{name}+suspend" if suspend else name
+            print(f"\n--- backend: {label} ---")
+            elapsed = run_backend(db, name, args.rows, args.seed, workdir, suspend)
+            results.append((label, elapsed))
+
+    db.close()
+
+    print(f"\n{'BACKEND':<18} | {'SECONDS':>8} | {'ROWS/SEC':>10}")
+    print("-" * 42)
+    timings = dict(results)
+    for label, elapsed in results:
+        print(f"{label:<18} | {elapsed:>8.2f} | {args.rows / elapsed:>10.0f}")
+    for name in backends:
+        if f"{name}+suspend" in timings:
+            saved = timings[name] - timings[f"{name}+suspend"]
+            print(f"Suspension saved {saved:.2f}s on {name} ({saved / timings[name]:.0%}).")
+    print(f"\nWork files: {workdir}")
+
+if __name__ == "__main__":
+    main()
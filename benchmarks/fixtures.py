@@ -0,0 +1,105 @@
+"""
+Deterministic fixtures for the micro-benchmarks.
+
+Everything the hot functions touch is created in a temporary working
+directory (mapping database, ML model, audit and rollback files) or in an
+in-memory SQLite database, and every random source is seeded.
+"""
+import os
+import random
+import tempfile
+
+from faker import Faker
+
+from app.config import Config
+
+SAMPLE_VALUES = {
+    'NAME': 'Maria Aparecida da Silva',
+    'EMAIL': 'maria.silva@example.com.br',
+    'CPF_CNPJ': '123.456.789-09',
+    'PHONE': '(11) 98765-4321',
+    'LOGIN': 'msilva82',
+    'TOKEN': 'eyJhbGciOiJIUzI1NiIsInR5cCI6',
+    'CREDIT_CARD': '4444-5555-6666-7777',
+    'NON_SENSITIVE': 'ACTIVE',
+}
+
+ROW_TABLE_ROWS = 1000
+
+class MicroFixtures:
+    def __init__(self, seed=1234):
+        self.seed = seed
+        random.seed(seed)
+        Faker.seed(seed)
+
+        self.workdir = tempfile.mkdtemp(prefix="anon_micro_")
+        self._old_cwd = os.getcwd()
+        # AuditLogger writes audit.log / rollback.csv to the working directory
+        os.chdir(self.workdir)
+
+        Config.ANONYMIZATION_DB_PATH = os.path.join(self.workdir, "mapping.db")
+        Config.ML_MODEL_PATH = os.path.join(self.workdir, "model.pkl")
+        Config.ML_COLUMN_MODEL_PATH = os.path.join(self.workdir, "column_model.pkl")
+        Config.DB_CONNECTION_STRING = "sqlite://"
+
+        from app.anonymization import Anonymizer
+        from app.logging import get_audit_logger
+        from app.ml import SensitiveDataClassifier, ColumnLevelClassifier
+
+        self.classifier = SensitiveDataClassifier()
+        self.column_classifier = ColumnLevelClassifier()
+        self.anonymizer = Anonymizer()
+        self.anonymizer.fake.seed_instance(seed)
+        self.audit = get_audit_logger()
+
+        fake = Faker('pt_BR')
+        fake.seed_instance(seed)
+        self.email_samples = [fake.email() for _ in range(50)]
+        self.column_stats = {'unique_ratio': 0.95, 'null_percentage': 0.02, 'total_rows': 100000}
+
+        # Values already mapped (hit path)
+        self.known_values = [f"known{i}@example.com" for i in range(1000)]
+        for v in self.known_values:
+            self.anonymizer.get_fake_value(v, 'EMAIL')
+
+        self._setup_row_table()
+
+    def _setup_row_table(self):
+        """In-memory SQLite table plus an open write transaction for the row loop body."""
+        from sqlalchemy import MetaData, Table, Column, Integer, String, insert, select
+        from app.db import DatabaseConnector
+        from app.execution import ExecutionEngine
+
+        self.db = DatabaseConnector()
+        self.db.connect()
+        metadata = MetaData()
+        self.table = Table(
+            'customers', metadata,
+            Column('id', Integer, primary_key=True, autoincrement=False),
+            Column('full_name', String(100)),
+            Column('email', String(100)),
+        )
+        metadata.create_all(self.db.engine)
+        with self.db.engine.begin() as conn:
+            conn.execute(insert(self.table), [
+                {'id': i, 'full_name': f"Cliente {i % 100}", 'email': f"cliente{i % 100}@example.com"}
+                for i in range(ROW_TABLE_ROWS)
+            ])
+
+        self.engine = ExecutionEngine(self.db, self.anonymizer, workers=1)
+        self.pk_cols = ['id']
+        self.row_cols = [
+            {'schema': None, 'table': 'customers', 'column': 'full_name', 'sensitive_type': 'NAME'},
+            {'schema': None, 'table': 'customers', 'column': 'email', 'sensitive_type': 'EMAIL'},
+        ]
+        self.conn = self.db.engine.connect()
+        self.trans = self.conn.begin()
+        t = self.table
+        self.rows = self.conn.execute(select(t.c.id, t.c.full_name, t.c.email)).fetchall()
+
+    def close(self):
+        self.trans.rollback()
+        self.conn.close()
+        self.db.close()
+        self.anonymizer.close()
+        os.chdir(self._old_cwd)
@@ -0,0 +1,158 @@
+"""
+Micro-benchmarks for the hot functions.
+
+Reports ops/sec and memory allocated per call for each case. Baselines are
+stored as JSON; in comparison mode the run fails (exit code 1) when a case
+is slower than the baseline by more than the threshold.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --save baseline.json
+    python -m benchmarks.micro --compare baseline.json --threshold 0.15
+    python -m benchmarks.micro --filter get_fake_value
+"""
+import argparse
+import itertools
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fixtures import MicroFixtures, SAMPLE_VALUES
+
+def build_cases(fx):
+    """Returns [(name, fn)] where fn() performs exactly one call of the measured function."""
+    cases = []
+    clf = fx.classifier
+
+    cases.append(('SensitiveDataClassifier._extract_features', lambda: clf._extract_features(
+        'maria.silva@example.com.br', 'email', 'VARCHAR(255)', fx.column_stats, 255)))
+    cases.append(('SensitiveDataClassifier.predict_column', lambda: clf.predict_column(
+        fx.email_samples, 'email', 'VARCHAR(255)', fx.column_stats, 255)))
+    cases.append(('ColumnLevelClassifier.predict_column', lambda: fx.column_classifier.predict_column(
+        fx.email_samples, 'email', 'VARCHAR(255)', fx.column_stats, 255)))
+
+    known = itertools.cycle(fx.known_values)
+    cases.append(('Anonymizer.get_fake_value[hit]', lambda: fx.anonymizer.get_fake_value(next(known), 'EMAIL')))
+    fresh = (f"new{i}@example.com" for i in itertools.count())
+    cases.append(('Anonymizer.get_fake_value[miss]', lambda: fx.anonymizer.get_fake_value(next(fresh), 'EMAIL')))
+
+    for label, value in SAMPLE_VALUES.items():
+        cases.append((f'Anonymizer._generate_fake[{label}]',
+                      lambda label=label, value=value: fx.anonymizer._generate_fake(label, value)))
+
+    cases.append(('AuditLogger.log_change', lambda: fx.audit.log_change(
+        'customers', 'email', 42, 'maria.silva@example.com.br', 'joao.souza@example.org')))
+
+    rows = itertools.cycle(fx.rows)
+    engine = fx.engine
+
+    def row_body():
+        # Body of ExecutionEngine._process_rows for one row on in-memory SQLite
+        updates = engine._transform_chunk([next(rows)], fx.pk_cols, fx.row_cols, 'customers')
+        if updates:
+            engine.backend.write_updates(fx.conn, fx.table, fx.pk_cols, updates)
+
+    cases.append(('ExecutionEngine._process_rows[row]', row_body))
+    return cases
+
+def measure(fn, min_time=0.2, repeats=5, alloc_calls=200):
+    """Returns ops/sec (median of `repeats` timed rounds) and allocation figures per call."""
+    fn()  # warm-up
+    # Calibrate the number of calls per round to last at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    rates = [number / elapsed]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rates.append(number / (time.perf_counter() - start))
+
+    # Peak memory allocated by a single call, averaged, plus blocks still held afterwards
+    # (a running sum, so the bookkeeping itself retains nothing)
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    peak_total = 0
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    for _ in range(alloc_calls):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    retained = sum(s.count_diff for s in after.compare_to(before, 'lineno'))
+
+    return {
+        'ops_per_sec': statistics.median(rates),
+        'alloc_bytes_per_call': peak_total / alloc_calls,
+        'retained_blocks_per_call': retained / alloc_calls,
+    }
+
+def compare(results, baseline, threshold):
+    """Prints the comparison and returns the names of the regressed cases."""
+    regressions = []
+    print(f"\n{'CASE':<45} | {'BASE OPS/S':>11} | {'NOW OPS/S':>11} | {'CHANGE':>7}")
+    print("-" * 84)
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<45} | {'-':>11} | {r['ops_per_sec']:>11.0f} | {'new':>7}")
+            continue
+        change = r['ops_per_sec'] / base['ops_per_sec'] - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45} | {base['ops_per_sec']:>11.0f} | {r['ops_per_sec']:>11.0f} | {change:>+7.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the hot functions.")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--filter', help="Only run cases whose name contains this text")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum seconds per timed round")
+    parser.add_argument('--save', metavar='PATH', help="Store the results as a baseline")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a stored baseline")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Allowed slowdown before failing (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    fx = MicroFixtures(args.seed)
+    results = {}
+    try:
+        print(f"{'CASE':<45} | {'OPS/SEC':>11} | {'ALLOC B/CALL':>12} | {'RETAINED BLK':>12}")
+        print("-" * 90)
+        for name, fn in build_cases(fx):
+            if args.filter and args.filter not in name:
+                continue
+            r = measure(fn, min_time=args.min_time)
+            results[name] = r
+            print(f"{name:<45} | {r['ops_per_sec']:>11.0f} | {r['alloc_bytes_per_call']:>12.0f} | {r['retained_blocks_per_call']:>12.2f}")
+    finally:
+        fx.close()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nFAILED: {len(regressions)} case(s) regressed more than {args.threshold:.0%}.")
+            sys.exit(1)
+        print(f"\nOK: no case regressed more than {args.threshold:.0%}.")
+
+if __name__ == "__main__":
+    main()